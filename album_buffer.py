@@ -0,0 +1,48 @@
+import threading
+import time
+
+
+class AlbumBuffer:
+    """Collects the messages of an album (media group) until no new one has arrived for window seconds."""
+
+    def __init__(self, window=1.0):
+        self.window = window
+        # group id -> (time the last item arrived, items)
+        self._groups = {}
+        self._lock = threading.Lock()
+        self.albums = 0
+        self.items = 0
+
+    def add(self, group_id, item):
+        """Add item to its group's batch; returns True when it starts a new batch."""
+        with self._lock:
+            self.items += 1
+            _, items = self._groups.get(group_id, (None, None))
+            if items is not None:
+                items.append(item)
+                self._groups[group_id] = (time.monotonic(), items)
+                return False
+            self._groups[group_id] = (time.monotonic(), [item])
+            self.albums += 1
+            return True
+
+    def collecting(self, group_id):
+        """Return whether a batch for group_id is being collected."""
+        with self._lock:
+            return group_id in self._groups
+
+    def wait_left(self, group_id):
+        """Return how many seconds are left until group_id has been quiet for window seconds."""
+        with self._lock:
+            last_added, _ = self._groups.get(group_id, (0.0, None))
+        return last_added + self.window - time.monotonic()
+
+    def take(self, group_id):
+        """Remove and return the items collected for group_id."""
+        with self._lock:
+            return self._groups.pop(group_id, (None, []))[1]
+
+    def stats(self):
+        """Return album/item counters and the number of batches being collected."""
+        with self._lock:
+            return {'albums': self.albums, 'items': self.items, 'collecting': len(self._groups)}
@@ -0,0 +1,155 @@
+import math
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from ascii_converter import FONT_REGISTRY, ASCIIArtConverter
+
+# Background of rendered frames, as in still renders
+BACKGROUND = 32
+
+# Fixed GIF palette: a 6x6x6 color cube followed by a 40-step gray ramp
+_CUBE_LEVELS = 6
+_GRAY_LEVELS = 40
+_CUBE = np.linspace(0, 255, _CUBE_LEVELS).round().astype(np.uint8)
+_GRAYS = np.linspace(0, 255, _GRAY_LEVELS).round().astype(np.uint8)
+GIF_PALETTE = np.concatenate([
+    np.stack(np.meshgrid(_CUBE, _CUBE, _CUBE, indexing='ij'), axis=-1).reshape(-1, 3),
+    np.repeat(_GRAYS[:, None], 3, axis=1)
+]).astype(np.uint8)
+
+
+def _palette_indices(colors):
+    """Map an (..., 3) uint8 RGB array to GIF_PALETTE indices, using the gray ramp for near-gray colors."""
+    colors = colors.astype(np.int32)
+    cube = (colors * (_CUBE_LEVELS - 1) + 127) // 255
+    indices = cube[..., 0] * _CUBE_LEVELS * _CUBE_LEVELS + cube[..., 1] * _CUBE_LEVELS + cube[..., 2]
+    gray = colors.sum(axis=-1) // 3
+    is_gray = colors.max(axis=-1) - colors.min(axis=-1) <= 255 // (_CUBE_LEVELS - 1) // 2
+    gray_indices = len(_CUBE) ** 3 + (gray * (_GRAY_LEVELS - 1) + 127) // 255
+    return np.where(is_gray, gray_indices, indices).astype(np.uint8)
+
+
+class ASCIIAnimationConverter:
+    """Converts animated GIFs and videos to animated ASCII GIFs, redrawing only the cells that changed."""
+
+    def __init__(self, width=80, contrast=1.0, brightness=1.0, color_mode='true_color',
+                 output_pixels=200000, max_frames=150, max_fps=15, color_tolerance=8):
+        self.converter = ASCIIArtConverter(
+            width=width, contrast=contrast, brightness=brightness,
+            color_mode=color_mode, output_pixels=output_pixels
+        )
+        self.max_frames = max_frames
+        self.max_fps = max_fps
+        self.color_tolerance = color_tolerance
+
+    def _cell_masks(self, family, font_size, cell_size):
+        """Scale every glyph of the registered font to a (width, height) cell, as uint16 coverage (0-255)."""
+        atlas, (left, top), _ = FONT_REGISTRY.glyph_atlas(family, font_size, self.converter.ASCII_CHARS)
+        char_box = FONT_REGISTRY.glyph_box(family, font_size, 'A')
+        # The cell plus every part of a glyph outside it, so descenders such as '_' are kept
+        height, width = atlas.shape[1:]
+        right = max(left + width, char_box[2])
+        bottom = max(top + height, char_box[3])
+        atlas = np.pad(atlas, ((0, 0), (0, bottom - top - height), (0, right - left - width)))
+        masks = [np.asarray(Image.fromarray(mask.astype(np.uint8)).resize(cell_size, Image.BOX)) for mask in atlas]
+        return np.stack(masks).astype(np.uint16)
+
+    def _frame_cells(self, frame, grid):
+        """Return the glyph index and display color of every cell of a BGR frame."""
+        converter = self.converter
+        small = cv2.resize(frame, grid, interpolation=cv2.INTER_AREA)
+        pixels = converter._adjust_pixels(np.ascontiguousarray(small[..., ::-1]))
+        glyphs = converter._glyph_indices(converter._to_grayscale(pixels))
+        return glyphs, converter._apply_color_mode(pixels)
+
+    def convert(self, path, output):
+        """Convert the clip at path to an animated GIF written to output and return its stats; raises ValueError when unreadable."""
+        capture = cv2.VideoCapture(path)
+        try:
+            if not capture.isOpened():
+                raise ValueError("Could not open the clip")
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            if not fps or math.isnan(fps):
+                fps = self.max_fps
+            # Keep every step-th source frame; grab() skips the others without decoding them
+            step = max(1, math.ceil(fps / self.max_fps))
+            started = time.perf_counter()
+            frames, source_frames, reused, total = self._render_frames(capture, step)
+            convert_ms = (time.perf_counter() - started) * 1000
+        finally:
+            capture.release()
+        if not frames:
+            raise ValueError("The clip has no frames")
+
+        started = time.perf_counter()
+        frames[0].save(
+            output, format='GIF', save_all=True, append_images=frames[1:],
+            duration=round(1000 * step / fps), loop=0, optimize=False
+        )
+        encode_ms = (time.perf_counter() - started) * 1000
+        return {
+            'frames': len(frames),
+            'source_frames': source_frames,
+            'size': frames[0].size,
+            'convert_ms': convert_ms,
+            'frames_per_second': len(frames) / (convert_ms / 1000) if convert_ms else 0.0,
+            'reused_cells': reused / total if total else 0.0,
+            'encode_ms': encode_ms,
+            'bytes': output.tell() if hasattr(output, 'tell') else None
+        }
+
+    def _render_frames(self, capture, step):
+        """Read, map and incrementally render frames; returns (frames, source frames, reused cells, cells)."""
+        converter = self.converter
+        palette = GIF_PALETTE.tobytes()
+        frames = []
+        source_frames = 0
+        reused = total = 0
+        canvas = None
+        while len(frames) < self.max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            source_frames += 1
+            for _ in range(step - 1):
+                if capture.grab():
+                    source_frames += 1
+
+            if canvas is None:
+                # Everything below depends only on the frame size, so it is set up once
+                grid = converter.grid_size(converter.width, (frame.shape[1], frame.shape[0]))
+                font_size = converter.font_size_for(grid)
+                columns, rows = grid
+                img_width, img_height = converter.output_size(grid, font_size)
+                cell_size = (img_width // columns, max(1, round(img_height / rows)))
+                family, _ = FONT_REGISTRY.get_font(font_size)
+                masks = self._cell_masks(family, font_size, cell_size)
+                canvas = np.empty((rows * cell_size[1], columns * cell_size[0]), dtype=np.uint8)
+                # (row, y in cell, column, x in cell) view of the frame buffer
+                cells = canvas.reshape(rows, cell_size[1], columns, cell_size[0])
+                shown_glyphs = np.full((rows, columns), -1, dtype=np.intp)
+                shown_colors = np.zeros((rows, columns, 3), dtype=np.uint8)
+
+            glyphs, colors = self._frame_cells(frame, grid)
+            color_change = np.abs(colors.astype(np.int16) - shown_colors).max(axis=-1)
+            changed = (glyphs != shown_glyphs) | (color_change > self.color_tolerance)
+            ys, xs = np.nonzero(changed)
+            total += changed.size
+            reused += changed.size - len(ys)
+
+            if len(ys):
+                # Integer alpha blend of the changed cells over the background, rounded
+                alpha = masks[glyphs[ys, xs]][..., None]
+                blocks = BACKGROUND * (255 - alpha) + colors[ys, xs][:, None, None, :].astype(np.uint16) * alpha
+                blocks = ((blocks + 127) // 255).astype(np.uint8)
+                cells[ys, :, xs, :] = _palette_indices(blocks)
+                shown_glyphs[ys, xs] = glyphs[ys, xs]
+                shown_colors[ys, xs] = colors[ys, xs]
+
+            image = Image.fromarray(canvas.copy(), 'P')
+            image.putpalette(palette)
+            frames.append(image)
+        return frames, source_frames, reused, total
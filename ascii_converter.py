@@ -1,175 +1,475 @@
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Monospace font families tried in order before falling back to Pillow's default font
+FONT_FAMILIES = ("Courier New", "DejaVu Sans Mono", "Consolas")
+
+
+def _build_glyph_atlas(font, chars):
+    """Rasterize every glyph of chars once, returning uint16 coverage masks, their (x, y) offset from the text origin and a code point to index table."""
+    boxes = [font.getbbox(char) for char in chars]
+    # One tile size that fits every glyph, including parts left of or above the origin
+    left = min(0, min(box[0] for box in boxes))
+    top = min(0, min(box[1] for box in boxes))
+    right = max(box[2] for box in boxes)
+    bottom = max(box[3] for box in boxes)
+    
+    tile = Image.new('L', (right - left, bottom - top), 0)
+    draw = ImageDraw.Draw(tile)
+    masks = np.empty((len(chars), bottom - top, right - left), dtype=np.uint16)
+    for index, char in enumerate(chars):
+        draw.rectangle((0, 0, tile.width, tile.height), fill=0)
+        draw.text((-left, -top), char, font=font, fill=255)
+        masks[index] = np.asarray(tile)
+    
+    char_to_index = np.zeros(256, dtype=np.intp)
+    char_to_index[np.frombuffer(chars.encode('ascii'), dtype=np.uint8)] = np.arange(len(chars))
+    return masks, (left, top), char_to_index
+
+
+class FontRegistry:
+    """Process-wide cache of fonts, glyph metrics and glyph atlases keyed by (family, size), including failed lookups."""
+    
+    def __init__(self, families=FONT_FAMILIES):
+        self.families = tuple(families)
+        self._fonts = {}
+        self._boxes = {}
+        self._atlases = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _cached(self, table, key, build):
+        """Return table[key], building and storing it on a miss."""
+        with self._lock:
+            if key in table:
+                self.hits += 1
+                return table[key]
+            self.misses += 1
+        # Built outside the lock so other lookups never wait on a font load or atlas; the first
+        # of concurrent builds of one key wins
+        value = build()
+        with self._lock:
+            return table.setdefault(key, value)
+    
+    def _load(self, family, size):
+        """Load a font from disk (None: Pillow's default, fixed-size before Pillow 10.1), returning None when it is not available."""
+        if family is None:
+            try:
+                return ImageFont.load_default(size)
+            except TypeError:
+                return ImageFont.load_default()
+        try:
+            return ImageFont.truetype(family, size)
+        except Exception:
+            return None
+    
+    def get_font(self, size):
+        """Return (family, font) for the first available family at size, or (None, Pillow's default font)."""
+        for family in self.families + (None,):
+            font = self._cached(self._fonts, (family, size), lambda: self._load(family, size))
+            if font is not None:
+                return family, font
+    
+    def glyph_box(self, family, size, char):
+        """Return the memoized bounding box of char for the font registered under (family, size)."""
+        font = self._fonts[(family, size)]
+        return self._cached(self._boxes, (family, size, char), lambda: font.getbbox(char))
+    
+    def glyph_atlas(self, family, size, chars):
+        """Return the memoized glyph atlas of chars for the font registered under (family, size)."""
+        font = self._fonts[(family, size)]
+        return self._cached(self._atlases, (family, size, chars), lambda: _build_glyph_atlas(font, chars))
+    
+    def stats(self):
+        """Return cache counters and sizes."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'fonts': sum(font is not None for font in self._fonts.values()),
+                'glyph_boxes': len(self._boxes),
+                'glyph_atlases': len(self._atlases)
+            }
+    
+    def clear(self):
+        """Drop every cached entry and reset the counters."""
+        with self._lock:
+            self._fonts.clear()
+            self._boxes.clear()
+            self._atlases.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by every converter in the process
+FONT_REGISTRY = FontRegistry()
+
+# Color mode transforms, each mapping an (..., 3) uint8 RGB array to the rendered colors
+COLOR_MODES = {}
+
+
+def register_color_mode(name):
+    """Register a whole-array color transform under name."""
+    def decorator(transform):
+        COLOR_MODES[name] = transform
+        return transform
+    return decorator
+
+
+def _average(colors):
+    """Integer mean of the RGB channels, equal to int(sum(color) / 3) per color."""
+    return colors.sum(axis=-1, dtype=np.uint16) // 3
+
+
+def _tint(channels):
+    """Build a transform that writes the average brightness into the given RGB channels."""
+    mask = np.array(channels, dtype=np.uint16)
+    return lambda colors: (_average(colors)[..., None] * mask).astype(np.uint8)
+
+
+@register_color_mode('true_color')
+def _true_color(colors):
+    return colors
+
+
+@register_color_mode('mono')
+def _mono(colors):
+    # Black and white only
+    white = colors.sum(axis=-1, dtype=np.uint16) >= 3 * 128
+    return np.repeat(np.where(white, 255, 0).astype(np.uint8)[..., None], 3, axis=-1)
+
+
+for _name, _channels in (('green', (0, 1, 0)), ('blue', (0, 0, 1)), ('red', (1, 0, 0)),
+                         ('cyan', (0, 1, 1)), ('magenta', (1, 0, 1)), ('yellow', (1, 1, 0)),
+                         ('grayscale', (1, 1, 1))):
+    register_color_mode(_name)(_tint(_channels))
+
 
 class ASCIIArtConverter:
     # ASCII characters from darkest to lightest (expanded set)
     ASCII_CHARS = r'$@B%8&WM#*oahkbdpqwmZO0QLCJUYXzcvunxrjft/\|()1{}[]?-_+~<>i!lI;:,"^`\'. '
     
-    def __init__(self, width=100, contrast=1.0, brightness=1.0, color_mode='true_color'):
+    # Available renderers: 'atlas' composites pre-rasterized glyph masks, 'text' draws every character with ImageDraw
+    RENDERERS = ('atlas', 'text')
+    
+    # What convert() produces: only the ASCII string, only the rendered image, or both
+    OUTPUTS = ('text', 'image', 'both')
+    
+    # How many times the grid size a source must keep when it is shrunk cheaply before resampling
+    REDUCING_GAP = 2.0
+    
+    # Largest and smallest font sizes a render uses; FONT_SIZE is also the size without a pixel budget
+    FONT_SIZE = 20
+    MIN_FONT_SIZE = 6
+    
+    def __init__(self, width=100, contrast=1.0, brightness=1.0, color_mode='true_color', renderer='atlas',
+                 font_size=None, output_pixels=None):
+        if renderer not in self.RENDERERS:
+            raise ValueError(f"Unknown renderer {renderer!r}, expected one of {self.RENDERERS}")
         self.width = width
         self.contrast = contrast
         self.brightness = brightness
         self.color_mode = color_mode
-        # Fixed font size for consistency
-        self.font_size = 20
-        # Try to load a monospace font
-        try:
-            self.font = ImageFont.truetype("Courier New", self.font_size)
-        except:
-            try:
-                self.font = ImageFont.truetype("DejaVu Sans Mono", self.font_size)
-            except:
-                try:
-                    self.font = ImageFont.truetype("Consolas", self.font_size)
-                except:
-                    self.font = ImageFont.load_default()
-    
-    def _adjust_image(self, image):
-        """Apply contrast and brightness adjustments."""
-        # Convert to float for calculations
-        img_array = np.array(image, dtype=float)
+        self.renderer = renderer
+        # A fixed font size wins over the output budget; without either FONT_SIZE is used
+        self.fixed_font_size = font_size
+        self.output_pixels = output_pixels
+        # Default monospace font from the shared registry, loaded from disk only once per process;
+        # renders pick their own size with font_size_for() and never change these
+        self.font_size = font_size or self.FONT_SIZE
+        self.font_family, self.font = FONT_REGISTRY.get_font(self.font_size)
+        # Lookup tables from gray level to glyph index and glyph code point
+        self._glyph_index_lut, self._glyph_code_lut = self._build_glyph_luts()
+        # Render buffers reused across conversions of the same size (see convert_many), kept
+        # per thread so one converter can be shared between threads
+        self._buffers = threading.local()
+    
+    def _build_glyph_luts(self):
+        """Precompute the glyph index and ASCII code for every gray level."""
+        scale = len(self.ASCII_CHARS) - 1
+        # Same float arithmetic as the per-pixel formula so the mapping is identical
+        indices = np.array([int(np.uint8(level) / 255 * scale) for level in range(256)], dtype=np.uint8)
+        codes = np.frombuffer(self.ASCII_CHARS.encode('ascii'), dtype=np.uint8)
+        return indices, codes[indices]
+    
+    def output_size(self, grid, font_size=None):
+        """Return the (width, height) in pixels of the render of a (columns, rows) grid."""
+        columns, rows = grid
+        font_size = font_size or self.font_size
+        family, _ = FONT_REGISTRY.get_font(font_size)
+        char_width = FONT_REGISTRY.glyph_box(family, font_size, 'A')[2]
+        img_width = char_width * columns
+        return img_width, (int(img_width * (rows / columns)) if columns else 0)
+    
+    def font_size_for(self, grid):
+        """Return the font size for a (columns, rows) grid, the largest that fits output_pixels when that is set."""
+        if self.fixed_font_size or not self.output_pixels:
+            return self.fixed_font_size or self.FONT_SIZE
+        for size in range(self.FONT_SIZE, self.MIN_FONT_SIZE, -1):
+            img_width, img_height = self.output_size(grid, size)
+            if img_width * img_height <= self.output_pixels:
+                return size
+        return self.MIN_FONT_SIZE
+    
+    def _get_glyph_atlas(self, family, font_size):
+        """Return the shared glyph atlas for the font registered under (family, font_size)."""
+        return FONT_REGISTRY.glyph_atlas(family, font_size, self.ASCII_CHARS)
+    
+    def _adjust_pixels(self, pixels):
+        """Apply contrast and brightness adjustments to a uint8 pixel array."""
+        # Contrast pivots on the mean of all channels, so the adjustment of each
+        # level is fixed once the mean is known and fits in a 256-entry lookup table
+        mean = np.mean(pixels, dtype=np.float64)
+        levels = np.arange(256, dtype=np.float64)
         
         # Apply contrast
-        mean = np.mean(img_array)
-        img_array = (img_array - mean) * self.contrast + mean
+        levels = (levels - mean) * self.contrast + mean
         
         # Apply brightness
-        img_array = img_array * self.brightness
-        
-        # Clip values to valid range
-        img_array = np.clip(img_array, 0, 255)
-        
-        # Convert back to uint8
-        return Image.fromarray(np.uint8(img_array))
-    
-    def _get_color(self, color):
-        """Get color based on color_mode."""
-        if self.color_mode == 'true_color':
-            return color
-        elif self.color_mode == 'mono':
-            # Black and white only
-            avg = sum(color) / 3
-            return (0, 0, 0) if avg < 128 else (255, 255, 255)
-        elif self.color_mode == 'green':
-            avg = sum(color) / 3
-            return (0, int(avg), 0)
-        elif self.color_mode == 'blue':
-            avg = sum(color) / 3
-            return (0, 0, int(avg))
-        elif self.color_mode == 'red':
-            avg = sum(color) / 3
-            return (int(avg), 0, 0)
-        elif self.color_mode == 'cyan':
-            avg = sum(color) / 3
-            return (0, int(avg), int(avg))
-        elif self.color_mode == 'magenta':
-            avg = sum(color) / 3
-            return (int(avg), 0, int(avg))
-        elif self.color_mode == 'yellow':
-            avg = sum(color) / 3
-            return (int(avg), int(avg), 0)
-        else:  # grayscale
-            avg = int(sum(color) / 3)
-            return (avg, avg, avg)
-    
-    def _resize_image(self, image):
-        """Resize image maintaining aspect ratio."""
-        # Get original dimensions
-        orig_width, orig_height = image.size
-        orig_aspect = orig_height / orig_width
-        
-        # Calculate target dimensions
-        target_width = self.width
-        target_height = int(target_width * orig_aspect)
-        
-        return image.resize((target_width, target_height))
-    
-    def _to_grayscale(self, image):
-        """Convert image to grayscale."""
-        return image.convert('L')
+        levels = levels * self.brightness
+        
+        # Clip values to valid range and convert back to uint8
+        lut = np.uint8(np.clip(levels, 0, 255))
+        return lut[pixels]
+    
+    def _apply_color_mode(self, colors):
+        """Apply color_mode to an (..., 3) array of RGB colors in one pass."""
+        # Unknown modes fall back to grayscale
+        transform = COLOR_MODES.get(self.color_mode, COLOR_MODES['grayscale'])
+        return transform(np.asarray(colors, dtype=np.uint8))
+    
+    def _resize_image(self, image, grid=None, box=None):
+        """Resize image to the character grid, shrinking large images by an integer factor (Image.reduce) first."""
+        grid = grid or self.grid_size(self.width, image.size)
+        # An empty grid is left for resize() to reject with its usual ValueError
+        return image.resize(grid, box=box, reducing_gap=self.REDUCING_GAP if all(grid) else None)
+    
+    def _plan_decode(self, image, draft=False):
+        """Return image's character grid and source box; with draft set, an undecoded JPEG is switched to a reduced decode scale in place."""
+        grid = self.grid_size(self.width, image.size)
+        if not draft:
+            return grid, None
+        cover = tuple(max(1, int(n * self.REDUCING_GAP)) for n in grid)
+        planned = image.draft(None, cover)
+        return grid, (planned[1] if planned else None)
+    
+    def _to_grayscale(self, pixels):
+        """Luminance of an RGB pixel array, using the same fixed-point ITU-R 601-2 weights as Pillow's convert('L')."""
+        weights = np.array([19595, 38470, 7471], dtype=np.uint32)
+        return ((pixels @ weights + 0x8000) >> 16).astype(np.uint8)
+    
+    def _prepare_pixels(self, img, draft=False):
+        """Resize once to the character grid and return the adjusted RGB array and its luminance."""
+        # Plan the decode before anything loads the pixels
+        grid, box = self._plan_decode(img, draft)
+        # Grayscale sources resize identically per channel, so expand them after shrinking
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img = self._resize_image(img, grid, box)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        pixels = self._adjust_pixels(np.asarray(img))
+        return pixels, self._to_grayscale(pixels)
+    
+    def _glyph_indices(self, image):
+        """Map grayscale pixels to indices into ASCII_CHARS."""
+        return self._glyph_index_lut[np.asarray(image, dtype=np.uint8)]
     
     def _pixels_to_ascii(self, image):
         """Convert pixels to ASCII characters."""
-        pixels = np.array(image)
-        ascii_str = []
-        
-        # Convert each pixel to an ASCII character
-        for row in pixels:
-            ascii_str.append(''.join([self.ASCII_CHARS[int(pixel / 255 * (len(self.ASCII_CHARS) - 1))] 
-                                    for pixel in row]))
-        return '\n'.join(ascii_str)
-    
-    def _create_ascii_image(self, ascii_str, original_image):
-        """Create an image from ASCII string with color based on original image."""
-        # Calculate dimensions
-        lines = ascii_str.split('\n')
-        char_width = self.font.getbbox('A')[2]
-        char_height = self.font.getbbox('A')[3]
+        pixels = np.asarray(image, dtype=np.uint8)
+        height, width = pixels.shape
         
-        # Get original dimensions for aspect ratio
-        orig_width, orig_height = original_image.size
-        orig_aspect = orig_height / orig_width
-        
-        # Calculate image dimensions to match original aspect ratio
-        img_width = char_width * len(lines[0])
-        img_height = int(img_width * orig_aspect)
+        # Look up every pixel's character code at once, with a newline column at the end of each row
+        codes = np.empty((height, width + 1), dtype=np.uint8)
+        codes[:, :width] = self._glyph_code_lut[pixels]
+        codes[:, width] = ord('\n')
+        return codes.tobytes()[:-1].decode('ascii')
+    
+    def _create_ascii_image(self, ascii_str, original_colors):
+        """Create an image from ASCII string with color based on the grid-sized original colors."""
+        # Calculate dimensions, with the font sized for this grid
+        lines = ascii_str.split('\n')
+        grid = (len(lines[0]), len(lines))
+        font_size = self.font_size_for(grid)
+        family, font = FONT_REGISTRY.get_font(font_size)
+        char_box = FONT_REGISTRY.glyph_box(family, font_size, 'A')
+        char_width = char_box[2]
+        char_height = char_box[3]
         
-        # Create new image with dark background
-        ascii_image = Image.new('RGB', (img_width, img_height), (32, 32, 32))
-        draw = ImageDraw.Draw(ascii_image)
+        # Calculate image dimensions to match the grid's aspect ratio
+        img_width, img_height = self.output_size(grid, font_size)
         
-        # Get color information from original image
-        original_colors = np.array(original_image.resize((len(lines[0]), len(lines))))
+        # Apply the color mode to every cell at once
+        colors = self._apply_color_mode(original_colors)
         
         # Calculate vertical spacing to distribute lines evenly
         total_text_height = char_height * len(lines)
         scale_factor = img_height / total_text_height
         adjusted_char_height = char_height * scale_factor
         
+        if self.renderer == 'atlas':
+            atlas = self._get_glyph_atlas(family, font_size)
+            return self._render_atlas(lines, colors, atlas, img_width, img_height, char_width, adjusted_char_height)
+        
+        # Create new image with dark background
+        ascii_image = Image.new('RGB', (img_width, img_height), (32, 32, 32))
+        draw = ImageDraw.Draw(ascii_image)
+        
         # Draw each character with corresponding color
         for y, line in enumerate(lines):
             for x, char in enumerate(line):
-                # Get color from original image and apply color mode
-                color = tuple(map(int, original_colors[y, x]))
-                final_color = self._get_color(color)
+                final_color = tuple(map(int, colors[y, x]))
                 # Calculate position to maintain aspect ratio
                 pos_x = x * char_width
                 pos_y = y * adjusted_char_height
                 # Draw character
-                draw.text((pos_x, pos_y), char, font=self.font, fill=final_color)
+                draw.text((pos_x, pos_y), char, font=font, fill=final_color)
         
         return ascii_image
     
-    def convert(self, image_input, output_dir="ascii_output"):
-        """Convert image to ASCII art and save both text and image versions."""
-        os.makedirs(output_dir, exist_ok=True)
+    def _render_atlas(self, lines, colors, atlas, img_width, img_height, char_width, row_height):
+        """Composite pre-rasterized glyph masks with the per-cell colors."""
+        masks, (offset_x, offset_y), char_to_index = atlas
+        tile_height, tile_width = masks.shape[1:]
+        
+        # Glyph index of every cell
+        codes = np.frombuffer(''.join(lines).encode('ascii'), dtype=np.uint8)
+        glyphs = char_to_index[codes.reshape(len(lines), len(lines[0]))]
+        colors = colors.astype(np.uint16)
+        rows, cols = glyphs.shape
+        
+        # Dark background, padded so tiles hanging over the edges need no clipping
+        pad_x = tile_width + abs(offset_x)
+        pad_y = tile_height + abs(offset_y)
+        canvas_shape = (img_height + 2 * pad_y, img_width + 2 * pad_x, 3)
+        canvas = getattr(self._buffers, 'canvas', None)
+        if canvas is None or canvas.shape != canvas_shape:
+            canvas = self._buffers.canvas = np.empty(canvas_shape, dtype=np.uint8)
+        canvas.fill(32)
+        
+        # Tile origins, matching the positions the text renderer draws at
+        xs = np.arange(cols) * char_width + offset_x + pad_x
+        ys = (np.arange(rows) * row_height).astype(np.intp) + offset_y + pad_y
+        
+        # Glyph tiles can be wider than a cell, so columns are composited in interleaved groups of
+        # disjoint tiles. Padding the masks to whole cells makes each group one contiguous strip.
+        column_step = max(1, -(-tile_width // char_width))
+        span = column_step * char_width
+        masks = self._get_strip_masks(masks, span)
+        for y in range(rows):
+            band = canvas[ys[y]:ys[y] + tile_height]
+            for start in range(column_step):
+                count = len(range(start, cols, column_step))
+                left = xs[start]
+                strip = band[:, left:left + count * span].reshape(tile_height, count, span, 3)
+                # Integer alpha blend: (background * (255 - a) + color * a) / 255, rounded
+                alpha = masks[:, glyphs[y, start::column_step]]
+                region = strip.astype(np.uint16)
+                region *= 255 - alpha
+                region += colors[y, start::column_step][None, :, None, :] * alpha
+                region += 127
+                region //= 255
+                strip[...] = region
+        
+        # fromarray copies the strided crop, so the canvas can be reused by the next render
+        return Image.fromarray(canvas[pad_y:pad_y + img_height, pad_x:pad_x + img_width])
+    
+    def _get_strip_masks(self, masks, span):
+        """Return the atlas masks padded to span columns, laid out for strip compositing."""
+        strip_masks = getattr(self._buffers, 'strip_masks', None)
+        if strip_masks is None or strip_masks[0] is not masks or strip_masks[1] != span:
+            # Stored as (height, glyph, width) so gathering a row of glyphs yields the strip layout directly
+            padded = np.pad(masks, ((0, 0), (0, 0), (0, span - masks.shape[2])))
+            strip_masks = self._buffers.strip_masks = (masks, span, np.ascontiguousarray(padded.transpose(1, 0, 2))[..., None])
+        return strip_masks[2]
+    
+    def map_grid(self, img, draft=False):
+        """Return the ASCII string of an open PIL image and its adjusted grid-sized RGB pixels, the inputs of render()."""
+        # Colors and luminance both come from one grid-sized buffer
+        pixels, gray = self._prepare_pixels(img, draft)
+        return self._pixels_to_ascii(gray), pixels
+    
+    def render(self, ascii_str, pixels):
+        """Render an ASCII string and the pixels returned with it by map_grid() in color_mode."""
+        return self._create_ascii_image(ascii_str, pixels)
+    
+    def _convert_image(self, img, output, draft=False):
+        """Run the conversion pipeline on an open PIL image."""
+        ascii_str, pixels = self.map_grid(img, draft)
+        if output == 'text':
+            # Text only: no color sampling and no rasterization
+            return ascii_str, None
+        
+        ascii_image = self.render(ascii_str, pixels)
+        return (None if output == 'image' else ascii_str), ascii_image
+    
+    def convert(self, image_input, output_dir=None, output='both'):
+        """Convert an image file path or PIL Image to (ascii_str, ascii_image), leaving None what output does not select."""
+        # output_dir is only accepted for backwards compatibility; nothing is written to disk
+        if output not in self.OUTPUTS:
+            raise ValueError(f"Unknown output {output!r}, expected one of {self.OUTPUTS}")
         
         # Handle both file paths and PIL Image objects
-        if isinstance(image_input, str):
+        if isinstance(image_input, (str, os.PathLike)):
             # It's a file path
             with Image.open(image_input) as img:
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                img = self._resize_image(img)
-                img = self._adjust_image(img)
-                original_resized = img.copy()
-                img = self._to_grayscale(img)
-                ascii_str = self._pixels_to_ascii(img)
-                ascii_image = self._create_ascii_image(ascii_str, original_resized)
-        else:
-            # It's a PIL Image object
-            img = image_input
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            img = self._resize_image(img)
-            img = self._adjust_image(img)
-            original_resized = img.copy()
-            img = self._to_grayscale(img)
-            ascii_str = self._pixels_to_ascii(img)
-            ascii_image = self._create_ascii_image(ascii_str, original_resized)
-        
-        return ascii_str, ascii_image
+                return self._convert_image(img, output, draft=True)
+        # It's a PIL Image object, owned by the caller, so it is not drafted
+        return self._convert_image(image_input, output)
+    
+    @staticmethod
+    def grid_size(width, image_size):
+        """Return the (columns, rows) character grid of a width-column conversion of image_size."""
+        orig_width, orig_height = image_size
+        return width, int(width * (orig_height / orig_width))
+    
+    def convert_many(self, images, workers=None, output='both'):
+        """Lazily convert file paths or PIL Images in input order (see convert), with workers > 1 across worker processes."""
+        if not workers or workers <= 1:
+            for image_input in images:
+                yield self.convert(image_input, output=output)
+            return
+        
+        settings = self._settings()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for image_input in images:
+                pending.append(executor.submit(_convert_with, settings, image_input, output))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def _settings(self):
+        """Constructor arguments that reproduce this converter."""
+        return {
+            'width': self.width,
+            'contrast': self.contrast,
+            'brightness': self.brightness,
+            'color_mode': self.color_mode,
+            'renderer': self.renderer,
+            'font_size': self.fixed_font_size,
+            'output_pixels': self.output_pixels
+        }
+
+
+# Converters reused by convert_many worker processes, keyed by their settings
+_worker_converters = {}
+
+
+def _convert_with(settings, image_input, output):
+    """Convert one image in a convert_many worker process."""
+    key = tuple(sorted(settings.items()))
+    if key not in _worker_converters:
+        _worker_converters[key] = ASCIIArtConverter(**settings)
+    return _worker_converters[key].convert(image_input, output=output)
 
 if __name__ == "__main__":
     # Example usage
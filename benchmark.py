@@ -0,0 +1,233 @@
+import ctypes
+import os
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from animation_converter import ASCIIAnimationConverter
+from ascii_converter import ASCIIArtConverter
+
+# Widths allowed by the settings menu (60-400 in steps of 20)
+WIDTHS = range(60, 401, 20)
+
+
+def _timeit(func, repeat=5):
+    """Return the best wall-clock time of several runs in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _sample_image(width, height):
+    """Build a deterministic noisy grayscale image of the given size."""
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (height, width), dtype=np.uint8), 'L')
+
+
+def _sample_photo(width=1280, height=960):
+    """Build a deterministic smooth RGB test photo."""
+    x = np.linspace(0, 1, width)[None, :]
+    y = np.linspace(0, 1, height)[:, None]
+    channels = [255 * x + 0 * y, 255 * y + 0 * x, 128 + 127 * np.sin(12 * x + 7 * y)]
+    return Image.fromarray(np.stack(channels, axis=-1).astype(np.uint8), 'RGB')
+
+
+def _legacy_pixels_to_ascii(converter, image):
+    """Per-pixel reference implementation the vectorized path replaced."""
+    pixels = np.array(image)
+    chars = converter.ASCII_CHARS
+    return '\n'.join(''.join([chars[int(pixel / 255 * (len(chars) - 1))] for pixel in row])
+                     for row in pixels)
+
+
+def _legacy_preprocess(converter, image):
+    """Multi-copy preprocessing the fused pipeline replaced."""
+    img = image.convert('RGB') if image.mode != 'RGB' else image
+    img = img.resize(converter.grid_size(converter.width, img.size), reducing_gap=converter.REDUCING_GAP)
+    img_array = np.array(img, dtype=float)
+    mean = np.mean(img_array)
+    img_array = np.clip(((img_array - mean) * converter.contrast + mean) * converter.brightness, 0, 255)
+    img = Image.fromarray(np.uint8(img_array))
+    original_resized = img.copy()
+    gray = np.array(img.convert('L'))
+    colors = np.array(original_resized.resize(original_resized.size))
+    return colors, gray
+
+
+def _phone_photo_bytes(format, width=4032, height=3024):
+    """Encode a 12 MP phone-sized test photo."""
+    buffer = BytesIO()
+    _sample_photo(width, height).save(buffer, format=format, quality=90)
+    return buffer.getvalue()
+
+
+def _full_decode(converter, data):
+    """Decode at full resolution, then resample to the grid, as before decode planning."""
+    with Image.open(BytesIO(data)) as img:
+        img = img.convert('RGB')
+        return np.asarray(img.resize(converter.grid_size(converter.width, img.size)))
+
+
+def _planned_decode(converter, data):
+    """Decode through the converter's planned draft/reduce path."""
+    with Image.open(BytesIO(data)) as img:
+        return converter._prepare_pixels(img, draft=True)
+
+
+def _proc_status_kib(field):
+    """Read a memory field such as VmRSS or VmHWM from /proc/self/status in KiB."""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+
+
+def _peak_rss_kib(func):
+    """Return the peak resident memory growth of func in KiB, including Pillow's untraced buffers (Linux with glibc only)."""
+    # Hand memory freed by earlier runs back to the OS so it is not silently reused
+    Image.core.clear_cache()
+    ctypes.CDLL('libc.so.6').malloc_trim(0)
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
+    before = _proc_status_kib('VmRSS')
+    func()
+    return _proc_status_kib('VmHWM') - before
+
+
+def _peak_kib(func):
+    """Return the peak traced allocation of func in KiB."""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def bench_pixels_to_ascii():
+    """Compare the legacy and vectorized glyph mapping across menu widths."""
+    print("pixels_to_ascii (ms)")
+    print(f"{'width':>6} {'legacy':>10} {'numpy':>10} {'speedup':>8}")
+    for width in WIDTHS:
+        converter = ASCIIArtConverter(width=width)
+        image = _sample_image(width, int(width * 0.75))
+        assert converter._pixels_to_ascii(image) == _legacy_pixels_to_ascii(converter, image)
+        legacy = _timeit(lambda: _legacy_pixels_to_ascii(converter, image))
+        fast = _timeit(lambda: converter._pixels_to_ascii(image))
+        print(f"{width:>6} {legacy:>10.2f} {fast:>10.3f} {legacy / fast:>7.0f}x")
+
+
+def bench_renderers():
+    """Compare the ImageDraw text renderer with the glyph-atlas renderer."""
+    photo = _sample_photo()
+    print("create_ascii_image (ms)")
+    print(f"{'width':>6} {'text':>10} {'atlas':>10} {'speedup':>8} {'mean diff':>10}")
+    for width in (60, 100, 200, 300, 400):
+        images = {}
+        timings = {}
+        for renderer in ASCIIArtConverter.RENDERERS:
+            converter = ASCIIArtConverter(width=width, renderer=renderer)
+            timings[renderer] = _timeit(lambda: converter.convert(photo), repeat=2)
+            images[renderer] = np.asarray(converter.convert(photo)[1], dtype=np.int16)
+        diff = np.abs(images['text'] - images['atlas']).mean()
+        print(f"{width:>6} {timings['text']:>10.1f} {timings['atlas']:>10.1f} "
+              f"{timings['text'] / timings['atlas']:>7.1f}x {diff:>10.4f}")
+
+
+def bench_output_budget(output_pixels=4000000):
+    """Compare fixed font-size renders with renders sized to a pixel budget."""
+    photo = _sample_photo()
+    print(f"render + PNG encode, fixed font vs {output_pixels / 1e6:.1f} MP budget (ms, KiB)")
+    print(f"{'width':>6} {'fixed size':>11} {'render':>8} {'encode':>8} {'KiB':>7} "
+          f"{'budget size':>11} {'font':>5} {'render':>8} {'encode':>8} {'KiB':>7}")
+    for width in (60, 200, 400):
+        row = f"{width:>6}"
+        for converter in (ASCIIArtConverter(width=width),
+                          ASCIIArtConverter(width=width, output_pixels=output_pixels)):
+            render = _timeit(lambda: converter.convert(photo, output='image'), repeat=2)
+            image = converter.convert(photo, output='image')[1]
+            png = BytesIO()
+            encode = _timeit(lambda: image.save(BytesIO(), format='PNG'), repeat=2)
+            image.save(png, format='PNG')
+            size = f"{image.width}x{image.height}"
+            font_size = converter.font_size_for(ASCIIArtConverter.grid_size(width, photo.size))
+            font = f" {font_size:>5}" if converter.output_pixels else ""
+            row += f" {size:>11}{font} {render:>8.1f} {encode:>8.1f} {png.tell() / 1024:>7.0f}"
+        print(row)
+
+
+def bench_preprocess():
+    """Compare legacy and fused preprocessing time and traced peak memory."""
+    photo = _sample_photo(4000, 3000)
+    print("preprocess (ms, traced peak KiB)")
+    print(f"{'width':>6} {'legacy':>10} {'fused':>10} {'legacy KiB':>11} {'fused KiB':>10}")
+    for width in (60, 200, 400):
+        converter = ASCIIArtConverter(width=width, contrast=1.3, brightness=0.9)
+        legacy_colors, legacy_gray = _legacy_preprocess(converter, photo)
+        colors, gray = converter._prepare_pixels(photo)
+        assert np.array_equal(legacy_colors, colors) and np.array_equal(legacy_gray, gray)
+        legacy = _timeit(lambda: _legacy_preprocess(converter, photo))
+        fused = _timeit(lambda: converter._prepare_pixels(photo))
+        legacy_peak = _peak_kib(lambda: _legacy_preprocess(converter, photo))
+        fused_peak = _peak_kib(lambda: converter._prepare_pixels(photo))
+        print(f"{width:>6} {legacy:>10.2f} {fused:>10.2f} {legacy_peak:>11.0f} {fused_peak:>10.0f}")
+
+
+def bench_decode():
+    """Compare full-resolution decoding with planned draft/reduce decoding of phone photos."""
+    print("decode 4032x3024 (ms, peak RSS growth KiB)")
+    print(f"{'format':>6} {'width':>6} {'full':>10} {'planned':>10} {'full KiB':>10} {'planned KiB':>12} {'mean diff':>10}")
+    for format in ('JPEG', 'PNG'):
+        data = _phone_photo_bytes(format)
+        for width in (60, 200, 400):
+            converter = ASCIIArtConverter(width=width)
+            full = _timeit(lambda: _full_decode(converter, data), repeat=3)
+            planned = _timeit(lambda: _planned_decode(converter, data), repeat=3)
+            diff = np.abs(_full_decode(converter, data).astype(np.int16)
+                          - _planned_decode(converter, data)[0].astype(np.int16)).mean()
+            # Contrast and brightness are 1.0, so the planned pixels are directly comparable
+            full_peak = _peak_rss_kib(lambda: _full_decode(converter, data))
+            planned_peak = _peak_rss_kib(lambda: _planned_decode(converter, data))
+            print(f"{format:>6} {width:>6} {full:>10.1f} {planned:>10.1f} {full_peak:>10} {planned_peak:>12} {diff:>10.3f}")
+
+
+def _sample_clip(path, frames=90, fps=30):
+    """Write a deterministic 640x480 clip of a ball moving over a static gradient."""
+    background = np.asarray(_sample_photo(640, 480))[..., ::-1].copy()
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (640, 480))
+    for index in range(frames):
+        frame = background.copy()
+        cv2.circle(frame, (50 + index * 6, 240), 40, (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def bench_animation():
+    """Compare full per-frame redraws with incremental cell reuse on a 3 s clip."""
+    print("animation 640x480, 90 frames at 30 fps (frames/s, share of cells reused)")
+    print(f"{'width':>6} {'tolerance':>10} {'frames/s':>9} {'reused':>7} {'encode':>8} {'KiB':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'clip.mp4')
+        _sample_clip(path)
+        for width in (60, 100):
+            # A negative tolerance redraws every cell of every frame
+            for tolerance in (-1, 0, 8):
+                stats = ASCIIAnimationConverter(width=width, color_tolerance=tolerance).convert(path, BytesIO())
+                print(f"{width:>6} {tolerance:>10} {stats['frames_per_second']:>9.0f} {stats['reused_cells']:>7.0%} "
+                      f"{stats['encode_ms']:>8.1f} {stats['bytes'] / 1024:>7.0f}")
+
+
+if __name__ == "__main__":
+    bench_pixels_to_ascii()
+    bench_renderers()
+    bench_output_budget()
+    bench_preprocess()
+    bench_decode()
+    bench_animation()
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, TimeoutError
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from animation_converter import ASCIIAnimationConverter
+from ascii_converter import FONT_REGISTRY, ASCIIArtConverter
+from image_intake import ImageIntake
+
+
+class ConversionPoolBusy(Exception):
+    """Raised when the conversion backlog is full."""
+
+
+def _warm_up():
+    """Load the converter font once when a worker process starts."""
+    ASCIIArtConverter()
+
+
+def _convert_job(image_bytes, converter_kwargs, output, preview_width=None):
+    """Convert encoded image bytes in a worker process and return (ascii_str, png_bytes, render_stats)."""
+    converter = ASCIIArtConverter(**converter_kwargs)
+    with Image.open(BytesIO(image_bytes), formats=ImageIntake.FORMATS) as image:
+        if output not in ASCIIArtConverter.OUTPUTS:
+            raise ValueError(f"Unknown output {output!r}, expected one of {ASCIIArtConverter.OUTPUTS}")
+        if preview_width and output != 'text' and preview_width > converter.width:
+            # Decode at a scale that also covers the preview source
+            ASCIIArtConverter(width=preview_width)._plan_decode(image, draft=True)
+        ascii_str, pixels = converter.map_grid(image, draft=True)
+        if output == 'text':
+            return ascii_str, None, None
+        ascii_image = converter.render(ascii_str, pixels)
+        font_size = converter.font_size_for((pixels.shape[1], pixels.shape[0]))
+        if output == 'image':
+            ascii_str = None
+        preview_source = None
+        if preview_width:
+            # The image is already decoded, so this is cheap; previews re-render from it at up to
+            # preview_width columns
+            grid = ASCIIArtConverter.grid_size(min(preview_width, image.width), image.size)
+            # Grayscale is expanded after shrinking, like the converter does
+            source = image if image.mode in ('RGB', 'L') else image.convert('RGB')
+            preview_source = np.asarray(source.resize(grid, reducing_gap=ASCIIArtConverter.REDUCING_GAP).convert('RGB'))
+
+    png = BytesIO()
+    started = time.perf_counter()
+    ascii_image.save(png, format='PNG')
+    render = {
+        'size': ascii_image.size,
+        'font_size': font_size,
+        'encode_ms': (time.perf_counter() - started) * 1000,
+        'bytes': png.tell(),
+        # Each worker process has its own registry, so its counters travel with the result
+        'font_registry': FONT_REGISTRY.stats()
+    }
+    if preview_source is not None:
+        render['preview_source'] = preview_source
+    return ascii_str, png.getvalue(), render
+
+
+def _convert_animation_job(clip_bytes, animation_kwargs):
+    """Convert an encoded GIF or video to an animated ASCII GIF in a worker process and return (gif_bytes, stats)."""
+    converter = ASCIIAnimationConverter(**animation_kwargs)
+    gif = BytesIO()
+    with tempfile.NamedTemporaryFile(suffix='.clip') as clip:
+        clip.write(clip_bytes)
+        clip.flush()
+        stats = converter.convert(clip.name, gif)
+    return gif.getvalue(), stats
+
+
+class ConversionPool:
+    """Runs ASCII conversions in worker processes with a bounded, never-blocking backlog and a per-job timeout."""
+
+    def __init__(self, workers=None, max_pending=None, timeout=60):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 2
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        # Spawned workers do not inherit the bot's threads and sockets
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_up
+        )
+
+    def submit(self, image_bytes, converter_kwargs, output='both', preview_width=None):
+        """Queue a conversion and return a future for its (ascii_str, png_bytes, render_stats) result."""
+        return self._submit(_convert_job, bytes(image_bytes), dict(converter_kwargs), output, preview_width)
+
+    def submit_animation(self, clip_bytes, animation_kwargs):
+        """Queue a GIF or video conversion and return a future for its (gif_bytes, stats) result."""
+        return self._submit(_convert_animation_job, bytes(clip_bytes), dict(animation_kwargs))
+
+    def _submit(self, job_function, *args):
+        """Queue job_function(*args) in a worker, bounded by the backlog and timed out like any job."""
+        if not self._slots.acquire(blocking=False):
+            raise ConversionPoolBusy(f"{self.max_pending} conversions already pending")
+
+        try:
+            job = self._executor.submit(job_function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # A timed-out job keeps its slot until the worker finishes it, so runaway jobs stay bounded
+        job.add_done_callback(lambda _: self._slots.release())
+
+        result = Future()
+        result.set_running_or_notify_cancel()
+        timer = threading.Timer(self.timeout, self._expire, (job, result))
+        timer.daemon = True
+        timer.start()
+        job.add_done_callback(lambda done: self._finish(done, result, timer))
+        return result
+
+    def _finish(self, job, result, timer):
+        """Forward a finished job to its result future unless it already timed out."""
+        timer.cancel()
+        if result.done():
+            return
+        try:
+            if job.cancelled():
+                result.set_exception(TimeoutError("Conversion cancelled"))
+            elif job.exception() is not None:
+                result.set_exception(job.exception())
+            else:
+                result.set_result(job.result())
+        except InvalidStateError:
+            # Lost the race against _expire
+            pass
+
+    def _expire(self, job, result):
+        """Fail the result future of a job that exceeded the timeout."""
+        job.cancel()
+        try:
+            result.set_exception(TimeoutError(f"Conversion took longer than {self.timeout}s"))
+        except InvalidStateError:
+            # Lost the race against _finish
+            pass
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
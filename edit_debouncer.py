@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+
+
+class EditDebouncer:
+    """Coalesces bursts of edits to the same message into one edit, skipping edits that change nothing."""
+
+    def __init__(self, delay=0.4, max_messages=10000):
+        self.delay = delay
+        self.max_messages = max_messages
+        self._pending = set()
+        self._shown = OrderedDict()
+        self._lock = threading.Lock()
+        self.requested = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.unchanged = 0
+
+    def request(self, key):
+        """Mark key's message for editing; returns True when the caller must schedule a flush."""
+        with self._lock:
+            self.requested += 1
+            if key in self._pending:
+                self.coalesced += 1
+                return False
+            self._pending.add(key)
+            return True
+
+    def take(self, key):
+        """Return whether an edit of key's message is still pending, clearing it."""
+        with self._lock:
+            if key not in self._pending:
+                return False
+            self._pending.discard(key)
+            return True
+
+    def cancel(self, key):
+        """Drop a pending edit of key's message."""
+        with self._lock:
+            self._pending.discard(key)
+
+    def changed(self, key, content):
+        """Return whether content differs from what key's message shows, recording it if so."""
+        with self._lock:
+            if self._shown.get(key) == content:
+                self._shown.move_to_end(key)
+                self.unchanged += 1
+                return False
+            self._remember(key, content)
+            self.sent += 1
+            return True
+
+    def shown(self, key, content):
+        """Record content as what key's message shows after an edit made elsewhere."""
+        with self._lock:
+            self._remember(key, content)
+
+    def _remember(self, key, content):
+        self._shown.pop(key, None)
+        self._shown[key] = content
+        while len(self._shown) > self.max_messages:
+            self._shown.popitem(last=False)
+
+    def stats(self):
+        """Return request/coalesced/sent/unchanged counters and the number of pending edits."""
+        with self._lock:
+            return {
+                'requested': self.requested,
+                'coalesced': self.coalesced,
+                'sent': self.sent,
+                'unchanged': self.unchanged,
+                'pending': len(self._pending)
+            }
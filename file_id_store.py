@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+import time
+
+
+class FileIdStore:
+    """Bounded, persistent (SQLite) LRU map from rendered results to the Telegram file_id they were sent as."""
+
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS file_ids (
+                key TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS file_ids_last_used ON file_ids (last_used);
+        """)
+        self._count = self._db.execute("SELECT COUNT(*) FROM file_ids").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def get(self, key):
+        """Return {'file_id', 'original_size'} for key, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT file_id, width, height, size FROM file_ids WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE file_ids SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+            # The render is not uploaded again
+            self.bytes_saved += row[3]
+            return {'file_id': row[0], 'original_size': (row[1], row[2])}
+
+    def put(self, key, file_id, original_size, size=0):
+        """Record the file_id a render of size bytes was uploaded as."""
+        width, height = original_size
+        with self._lock:
+            exists = self._db.execute("SELECT 1 FROM file_ids WHERE key = ?", (key,)).fetchone() is not None
+            self._db.execute(
+                "INSERT OR REPLACE INTO file_ids (key, file_id, width, height, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, file_id, width, height, size, time.time())
+            )
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM file_ids WHERE key IN "
+                    "(SELECT key FROM file_ids ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries,)
+                )
+                self._count = self.max_entries
+            self._db.commit()
+
+    def discard(self, key):
+        """Forget a file_id Telegram no longer accepts."""
+        with self._lock:
+            if self._db.execute("DELETE FROM file_ids WHERE key = ?", (key,)).rowcount:
+                self._count -= 1
+            self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters, bytes saved and the number of stored file_ids."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_saved': self.bytes_saved,
+                'entries': self._count
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
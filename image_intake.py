@@ -0,0 +1,99 @@
+import io
+
+from PIL import Image
+
+from ascii_converter import ASCIIArtConverter
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only file over a memoryview, so headers can be parsed without copying the buffer."""
+
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._position = max(0, (0, self._position, len(self._view))[whence] + offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+
+class ImageRejected(Exception):
+    """Raised when an upload falls outside the intake budgets; the message can be shown to users."""
+
+
+class ImageIntake:
+    """Checks uploads against file size and decoded memory budgets before anything decodes them."""
+
+    # Formats the bot decodes; anything else is rejected whatever its declared mime type
+    FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF', 'BMP')
+
+    def __init__(self, max_bytes=20 * 1024 * 1024, max_decoded_bytes=200 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_decoded_bytes = max_decoded_bytes
+
+    def check_declared(self, file_size):
+        """Reject a file whose declared size is over the byte budget."""
+        if file_size and file_size > self.max_bytes:
+            raise ImageRejected(
+                f"That file is {file_size / 1024 / 1024:.1f} MB, I can only take images up to "
+                f"{self.max_bytes / 1024 / 1024:.0f} MB."
+            )
+
+    def inspect(self, data, width):
+        """Check the header of downloaded bytes for a width-column conversion and return the image size."""
+        self.check_declared(len(data))
+        try:
+            with memoryview(data) as view, Image.open(_BufferReader(view), formats=self.FORMATS) as image:
+                image_format, mode, size = image.format, image.mode, image.size
+        except Image.DecompressionBombError:
+            raise ImageRejected("That image is far too large for me to convert.")
+        except OSError:
+            raise ImageRejected("That file isn't an image I can read.")
+
+        if self.decoded_bytes(image_format, mode, size, width) > self.max_decoded_bytes:
+            raise ImageRejected(
+                f"That image is {size[0]}x{size[1]}, too large for me to convert. "
+                "Try sending it as a photo instead of a file."
+            )
+        return size
+
+    @classmethod
+    def decoded_bytes(cls, image_format, mode, size, width):
+        """Peak memory in bytes the converter needs to decode an image of this format, mode and size."""
+        pixels = cls.decoded_pixels(image_format, size, width)
+        # Pillow keeps 1, 2 or 4 bytes per pixel depending on the mode
+        pixel_bytes = 1 if mode in ('1', 'L', 'P') else 2 if mode.startswith('I;16') else 4
+        decoded = pixels * pixel_bytes
+        # Modes other than RGB and L are converted to RGB at full size before resizing
+        if mode not in ('RGB', 'L'):
+            decoded += pixels * 4
+        return decoded
+
+    @staticmethod
+    def decoded_pixels(image_format, size, width):
+        """Number of pixels the converter decodes for an image of this format and size."""
+        image_width, image_height = size
+        if image_format != 'JPEG':
+            return image_width * image_height
+
+        # Same scale Image.draft picks for the cover size requested by the converter
+        grid = ASCIIArtConverter.grid_size(width, size)
+        cover = [max(1, int(n * ASCIIArtConverter.REDUCING_GAP)) for n in grid]
+        fit = min(image_width // cover[0], image_height // cover[1])
+        scale = next((s for s in (8, 4, 2) if fit >= s), 1)
+        return -(-image_width // scale) * -(-image_height // scale)
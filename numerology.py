@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import numpy as np
+
+LETTER_VALUES = {
+    'A': 1, 'J': 1, 'S': 1,
+    'B': 2, 'K': 2, 'T': 2,
+    'C': 3, 'L': 3, 'U': 3,
+    'D': 4, 'M': 4, 'V': 4,
+    'E': 5, 'N': 5, 'W': 5,
+    'F': 6, 'O': 6, 'X': 6,
+    'G': 7, 'P': 7, 'Y': 7,
+    'H': 8, 'Q': 8, 'Z': 8,
+    'I': 9, 'R': 9
+}
+
+# Master numbers are never reduced further
+MASTER_NUMBERS = (11, 22)
+
+# Years of datetime's range, all covered by the lookup tables below
+MIN_YEAR, MAX_YEAR = 1, 9999
+
+
+def _digit_sums(values):
+    """Sum of the decimal digits of every value in a non-negative integer array."""
+    values = np.asarray(values, dtype=np.int64)
+    sums = np.zeros_like(values)
+    while values.any():
+        sums += values % 10
+        values = values // 10
+    return sums
+
+
+def _reduce(total, stop_at_masters):
+    """Sum digits until the total is a single digit (or a master number when stop_at_masters)."""
+    while total > 9 and not (stop_at_masters and total in MASTER_NUMBERS):
+        total = sum(int(d) for d in str(total))
+    return total
+
+
+# Reduced month, day and year components of a life path: months and days reduce to their
+# digit root, years keep their second digit sum, which can still be 10 or 11
+_MONTH_ROOTS = _digit_sums(np.arange(13))
+_DAY_ROOTS = _digit_sums(_digit_sums(np.arange(32)))
+_YEAR_ROOTS = _digit_sums(_digit_sums(np.arange(MAX_YEAR + 1)))
+
+# Life path per component total: master numbers are kept, anything else reduced to one digit
+_LIFE_PATH_BY_TOTAL = np.array(
+    [total if total in MASTER_NUMBERS else _reduce(total, False)
+     for total in range(int(_MONTH_ROOTS.max() + _DAY_ROOTS.max() + _YEAR_ROOTS.max()) + 1)],
+    dtype=np.int64
+)
+
+# Destiny per letter sum, reduced step by step so master numbers met on the way are kept
+_DESTINY_BY_TOTAL = np.array([_reduce(total, True) for total in range(10000)], dtype=np.int64)
+
+
+class _LetterDigits(dict):
+    """str.translate table mapping letters to their value as a digit and deleting everything else."""
+
+    def __missing__(self, key):
+        return None
+
+
+_LETTER_DIGITS = _LetterDigits({ord(letter): str(value) for letter, value in LETTER_VALUES.items()})
+
+
+def letter_sum(name: str) -> int:
+    """Sum of the letter values of a name, ignoring anything that is not A-Z after upper-casing."""
+    digits = name.upper().translate(_LETTER_DIGITS).encode('ascii')
+    # Each digit character is its value plus ord('0')
+    return sum(digits) - ord('0') * len(digits)
+
+
+def calculate_life_path(birth_date: datetime) -> int:
+    """Calculate Life Path Number from birth date."""
+    total = _MONTH_ROOTS[birth_date.month] + _DAY_ROOTS[birth_date.day] + _YEAR_ROOTS[birth_date.year]
+    return int(_LIFE_PATH_BY_TOTAL[total])
+
+
+def calculate_destiny(full_name: str) -> int:
+    """Calculate Destiny Number from full name."""
+    total = letter_sum(full_name)
+    if total < len(_DESTINY_BY_TOTAL):
+        return int(_DESTINY_BY_TOTAL[total])
+    return _reduce(total, True)
+
+
+def calculate_life_paths(birth_dates) -> np.ndarray:
+    """Calculate Life Path Numbers for an array-like of birth dates, as an integer array of the same shape."""
+    dates = np.asarray(birth_dates)
+    if not np.issubdtype(dates.dtype, np.datetime64):
+        dates = dates.astype('datetime64[D]')
+    month_starts = dates.astype('datetime64[M]')
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = month_starts.astype(np.int64) % 12 + 1
+    days = (dates.astype('datetime64[D]') - month_starts).astype(np.int64) + 1
+    if years.size and (years.min() < MIN_YEAR or years.max() > MAX_YEAR):
+        raise ValueError(f"Birth years must be between {MIN_YEAR} and {MAX_YEAR}")
+    return _LIFE_PATH_BY_TOTAL[_MONTH_ROOTS[months] + _DAY_ROOTS[days] + _YEAR_ROOTS[years]]
+
+
+def calculate_destinies(full_names) -> np.ndarray:
+    """Calculate Destiny Numbers for many names at once, returned as an integer array."""
+    return np.array([calculate_destiny(name) for name in full_names], dtype=np.int64)
@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+
+
+class PreviewCache:
+    """Per-user LRU cache, bounded in bytes, of the last converted image and the reply showing it."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.grid_reuses = 0
+
+    def put(self, user_id, source, original_size, chat_id, message_id, shown=None, source_id=None):
+        """Remember a user's last converted image (source_id identifies it) and the reply showing it."""
+        with self._lock:
+            self._drop(user_id)
+            entry = {
+                'source': source,
+                'source_id': source_id,
+                'original_size': tuple(original_size),
+                'chat_id': chat_id,
+                'message_id': message_id,
+                'shown': shown,
+                'grid': None
+            }
+            self._store(user_id, entry)
+
+    def get(self, user_id):
+        """Return the user's entry dict, or None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry
+
+    def glyph_grid(self, user_id, key):
+        """Return the (ascii_str, pixels) stored for key in the user's entry, or None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry['grid'] is None or entry['grid'][0] != key:
+                return None
+            self.grid_reuses += 1
+            return entry['grid'][1:]
+
+    def set_glyph_grid(self, user_id, key, ascii_str, pixels):
+        """Store the glyph grid computed for key, replacing the previous one."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            self._drop(user_id)
+            self._store(user_id, dict(entry, grid=(key, ascii_str, pixels)))
+
+    def mark_shown(self, user_id, shown):
+        """Record the settings key the user's reply shows after an edit."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry['shown'] = shown
+
+    def retarget(self, user_id, source_id, chat_id, message_id, shown=None):
+        """Point the user's entry at a new reply of the same image; drops it and returns False otherwise."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or source_id is None or entry['source_id'] != source_id:
+                self._drop(user_id)
+                return False
+            entry.update(chat_id=chat_id, message_id=message_id, shown=shown)
+            self._entries.move_to_end(user_id)
+            return True
+
+    def discard(self, user_id):
+        """Forget a user's entry, e.g. once the reply can no longer be edited."""
+        with self._lock:
+            self._drop(user_id)
+
+    def stats(self):
+        """Return hit/miss and glyph grid reuse counters and the cache size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'grid_reuses': self.grid_reuses,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+    @staticmethod
+    def _size(entry):
+        size = entry['source'].nbytes
+        if entry['grid'] is not None:
+            size += len(entry['grid'][1]) + entry['grid'][2].nbytes
+        return size
+
+    def _store(self, user_id, entry):
+        self._entries[user_id] = entry
+        self._bytes += self._size(entry)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= self._size(old)
+
+    def _drop(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= self._size(entry)
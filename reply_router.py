@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Who may answer a prompt (None: anyone), which flow it belongs to and the flow's step
+Prompt = namedtuple('Prompt', 'user_id flow step')
+
+
+class ReplyRouter:
+    """Routes replies to the bot's prompts to their flow's handler by the message_id being answered."""
+
+    def __init__(self, max_prompts=100000):
+        self.max_prompts = max_prompts
+        self._flows = {}
+        self._prompts = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.routed = 0
+        self.unrouted = 0
+
+    def open(self, path):
+        """Store prompts in the SQLite database at path, restoring the most recent ones kept there."""
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS prompts (
+                chat_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                user_id INTEGER,
+                flow TEXT NOT NULL,
+                step INTEGER,
+                created REAL NOT NULL,
+                PRIMARY KEY (chat_id, message_id)
+            );
+            CREATE INDEX IF NOT EXISTS prompts_created ON prompts (created);
+        """)
+        rows = db.execute("SELECT chat_id, message_id, user_id, flow, step FROM prompts ORDER BY created").fetchall()
+        with self._lock:
+            self._db = db
+            for chat_id, message_id, user_id, flow, step in rows:
+                self._prompts.setdefault((chat_id, message_id), Prompt(user_id, flow, step))
+            self._evict()
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def flow(self, name):
+        """Decorator registering handler(update, context, prompt) for replies to name's prompts."""
+        def register(handler):
+            self._flows[name] = handler
+            return handler
+        return register
+
+    def expect(self, message, flow, user_id=None, step=None):
+        """Record a sent prompt message so replies to it reach flow; returns the message."""
+        key = (message.chat_id, message.message_id)
+        with self._lock:
+            self._prompts.pop(key, None)
+            self._prompts[key] = Prompt(user_id, flow, step)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO prompts (chat_id, message_id, user_id, flow, step, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    key + (user_id, flow, step, time.time())
+                )
+            self._evict()
+            if self._db is not None:
+                self._db.commit()
+        return message
+
+    def forget(self, chat_id, message_id):
+        """Stop routing replies to a prompt, e.g. once it has been answered or deleted."""
+        with self._lock:
+            if self._prompts.pop((chat_id, message_id), None) is not None and self._db is not None:
+                self._db.execute("DELETE FROM prompts WHERE chat_id = ? AND message_id = ?", (chat_id, message_id))
+                self._db.commit()
+
+    def lookup(self, message):
+        """Return the Prompt that message replies to, or None."""
+        reply_to = message.reply_to_message
+        if reply_to is None:
+            return None
+        with self._lock:
+            return self._prompts.get((reply_to.chat_id, reply_to.message_id))
+
+    def route(self, update, context):
+        """Hand a reply to its flow's handler; returns whether one was found."""
+        prompt = self.lookup(update.message)
+        handler = self._flows.get(prompt.flow) if prompt else None
+        if prompt is not None and prompt.user_id not in (None, update.effective_user.id):
+            handler = None
+        with self._lock:
+            if handler is None:
+                self.unrouted += 1
+                return False
+            self.routed += 1
+        handler(update, context, prompt)
+        return True
+
+    def _evict(self):
+        while len(self._prompts) > self.max_prompts:
+            key, _ = self._prompts.popitem(last=False)
+            if self._db is not None:
+                self._db.execute("DELETE FROM prompts WHERE chat_id = ? AND message_id = ?", key)
+
+    def stats(self):
+        """Return routed/unrouted reply counters and the number of remembered prompts."""
+        with self._lock:
+            return {'routed': self.routed, 'unrouted': self.unrouted, 'prompts': len(self._prompts)}
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Two-tier (memory, then disk_dir) LRU cache of ASCII strings, PNGs and original sizes keyed by source image and settings."""
+
+    def __init__(self, max_memory_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def key(file_unique_id, width, contrast, brightness, color_mode, *extra):
+        """Build the content-addressed cache key for a source image and settings tuple."""
+        # Rounded so menu steps back to a previous value (1.0 + 0.1 - 0.1) hit the same entry
+        settings = (width, round(contrast, 2), round(brightness, 2), color_mode) + extra
+        return hashlib.sha1(repr((file_unique_id, settings)).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached entry dict for key, or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return self._hit(entry)
+            on_disk = key in self._disk
+
+        # Files are read outside the lock so other handlers never wait on disk I/O
+        entry = self._read_disk(key) if on_disk else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                if on_disk:
+                    self._disk_bytes -= self._disk.pop(key, 0)
+            else:
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self._store_memory(key, entry)
+                return self._hit(entry)
+        if on_disk:
+            self._remove_files([key])
+        return None
+
+    def put(self, key, ascii_str, png, original_size, source_bytes=0):
+        """Cache a finished conversion."""
+        entry = {
+            'ascii_str': ascii_str,
+            'png': png,
+            'original_size': tuple(original_size),
+            'source_bytes': source_bytes
+        }
+        with self._lock:
+            self._store_memory(key, entry)
+        if not self.disk_dir:
+            return
+
+        size = self._write_disk(key, entry)
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            if size is not None:
+                self._disk[key] = size
+                self._disk_bytes += size
+            evicted = self._evict_disk()
+        self._remove_files(evicted if size is not None else evicted + [key])
+
+    def stats(self):
+        """Return hit/miss counters, hit rate, bytes saved and tier sizes."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes
+            }
+
+    def _hit(self, entry):
+        self.hits += 1
+        # A hit skips downloading the source image
+        self.bytes_saved += entry['source_bytes']
+        return entry
+
+    @staticmethod
+    def _size(entry):
+        return len(entry['png']) + len(entry['ascii_str'])
+
+    def _store_memory(self, key, entry):
+        """Insert into the memory tier, evicting least recently used entries over budget."""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= self._size(previous)
+        if self._size(entry) > self.max_memory_bytes:
+            return
+        self._memory[key] = entry
+        self._memory_bytes += self._size(entry)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= self._size(evicted)
+
+    def _paths(self, key):
+        return os.path.join(self.disk_dir, key + '.png'), os.path.join(self.disk_dir, key + '.txt')
+
+    def _load_disk_index(self):
+        """Index existing disk entries, least recently used first."""
+        entries = []
+        for item in os.scandir(self.disk_dir):
+            if item.name.endswith('.png'):
+                key = item.name[:-4]
+                text_path = self._paths(key)[1]
+                if os.path.exists(text_path):
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, key, stat.st_size + os.path.getsize(text_path)))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._remove_files(self._evict_disk())
+
+    def _read_disk(self, key):
+        """Load an entry's files, or return None when they are missing or damaged."""
+        png_path, text_path = self._paths(key)
+        try:
+            with open(png_path, 'rb') as f:
+                png = f.read()
+            with open(text_path, encoding='utf-8') as f:
+                header, ascii_str = f.read().split('\n', 1)
+            # Header line: "<width> <height> <source bytes>"
+            width, height, source_bytes = header.split(' ')
+            os.utime(png_path)
+        except (OSError, ValueError):
+            return None
+        return {
+            'ascii_str': ascii_str,
+            'png': png,
+            'original_size': (int(width), int(height)),
+            'source_bytes': int(source_bytes)
+        }
+
+    def _write_disk(self, key, entry):
+        """Write an entry's files and return their total size, or None on failure."""
+        png_path, text_path = self._paths(key)
+        width, height = entry['original_size']
+        header = f"{width} {height} {entry['source_bytes']}"
+        # Written under a temporary name and renamed, so readers never see half a file
+        suffix = f".{threading.get_ident()}.tmp"
+        try:
+            with open(png_path + suffix, 'wb') as f:
+                f.write(entry['png'])
+            with open(text_path + suffix, 'w', encoding='utf-8') as f:
+                f.write(header + '\n' + entry['ascii_str'])
+            os.replace(png_path + suffix, png_path)
+            os.replace(text_path + suffix, text_path)
+            return os.path.getsize(png_path) + os.path.getsize(text_path)
+        except OSError:
+            for path in (png_path + suffix, text_path + suffix):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return None
+
+    def _evict_disk(self):
+        """Drop least recently used keys from the disk index over budget and return them."""
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _remove_files(self, keys):
+        for key in keys:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
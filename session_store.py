@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionStore:
+    """Tracks when the flow sessions kept in user_data were last used and expires idle or least recently used ones."""
+
+    def __init__(self, ttls, default_ttl=3600, max_sessions=50000):
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.max_sessions = max_sessions
+        # (user_id, flow) -> (last used, user_data), least recently used first
+        self._sessions = OrderedDict()
+        self._changed = set()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.ended = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def start(self, user_data, user_id, flow, state):
+        """Store state as user_data[flow] and begin tracking it; returns state."""
+        with self._lock:
+            user_data[flow] = state
+            self._sessions.pop((user_id, flow), None)
+            self._sessions[(user_id, flow)] = (time.monotonic(), user_data)
+            self.started += 1
+            while len(self._sessions) > self.max_sessions:
+                (old_user_id, old_flow), (_, old_user_data) = self._sessions.popitem(last=False)
+                old_user_data.pop(old_flow, None)
+                self._changed.add(old_user_id)
+                self.evicted += 1
+        return state
+
+    def active(self, user_data, user_id, flow):
+        """Return whether user_data holds a live flow session, refreshing its TTL (or adopting restored state) if so."""
+        with self._lock:
+            if flow not in user_data:
+                self._sessions.pop((user_id, flow), None)
+                return False
+            now = time.monotonic()
+            entry = self._sessions.pop((user_id, flow), None)
+            if entry is not None and now - entry[0] > self.ttls.get(flow, self.default_ttl):
+                del user_data[flow]
+                self.expired += 1
+                return False
+            self._sessions[(user_id, flow)] = (now, user_data)
+            return True
+
+    def end(self, user_data, user_id, flow):
+        """Remove a finished session."""
+        with self._lock:
+            user_data.pop(flow, None)
+            if self._sessions.pop((user_id, flow), None) is not None:
+                self.ended += 1
+
+    def sweep(self):
+        """Drop all expired sessions and return the ids of users whose user_data changed."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                key for key, (last_used, _) in self._sessions.items()
+                if now - last_used > self.ttls.get(key[1], self.default_ttl)
+            ]
+            for user_id, flow in expired:
+                _, user_data = self._sessions.pop((user_id, flow))
+                user_data.pop(flow, None)
+                self._changed.add(user_id)
+            self.expired += len(expired)
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def stats(self):
+        """Return live session counts per flow and lifetime start/end/expiry/eviction counters."""
+        with self._lock:
+            live = {}
+            for _, flow in self._sessions:
+                live[flow] = live.get(flow, 0) + 1
+            return {
+                'live_sessions': len(self._sessions),
+                'live_by_flow': live,
+                'started': self.started,
+                'ended': self.ended,
+                'expired': self.expired,
+                'evicted': self.evicted
+            }
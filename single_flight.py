@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Table of in-flight work, so concurrent identical requests share one execution and its future."""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def join(self, key):
+        """Return (future, leader) for key; leader is True when the caller must do the work."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._flights[key] = Future()
+            future.set_running_or_notify_cancel()
+            self.leaders += 1
+            return future, True
+
+    def finish(self, key, result=None, exception=None):
+        """End key's flight, delivering result (or exception) to every request that joined it."""
+        with self._lock:
+            future = self._flights.pop(key)
+            if exception is not None:
+                self.failed += 1
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def stats(self):
+        """Return the number of flights in progress and leader/coalesced/failed counters."""
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'failed': self.failed
+            }
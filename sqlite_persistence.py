@@ -0,0 +1,152 @@
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+
+from telegram.ext import BasePersistence
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(blob):
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
+class _RowLoader:
+    """default_factory of LazyUserData; also loads stored rows on first access."""
+
+    def __init__(self, persistence):
+        self.persistence = persistence
+
+    def __call__(self):
+        return {}
+
+    def load(self, user_id):
+        return self.persistence.load_user_data(user_id)
+
+
+class LazyUserData(defaultdict):
+    """user_data mapping that reads a user's row from SQLite the first time the user is seen."""
+
+    def __missing__(self, user_id):
+        # The loader is the default_factory, so copies python-telegram-bot makes stay lazy too
+        data = self.default_factory.load(user_id)
+        self[user_id] = data
+        return data
+
+
+class SQLitePersistence(BasePersistence):
+    """Persists user_data in SQLite, one pickled row per user, loading users lazily and writing changed rows in batches."""
+
+    def __init__(self, path, flush_interval=5.0, max_tracked=100000):
+        super().__init__(store_user_data=True, store_chat_data=False, store_bot_data=False)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS user_data (user_id INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+        self._db.commit()
+        # Digest of the last persisted pickle per recently seen user, to detect changes without
+        # touching the database
+        self._saved = OrderedDict()
+        self._dirty = {}
+        self.rows_written = 0
+        self.flushes = 0
+
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='persistence-flush', daemon=True)
+        self._flusher.start()
+
+    def load_user_data(self, user_id):
+        """Return the stored user_data for user_id, or an empty dict."""
+        with self._lock:
+            blob = self._dirty.get(user_id)
+            if blob is None:
+                row = self._db.execute("SELECT data FROM user_data WHERE user_id = ?", (user_id,)).fetchone()
+                blob = row[0] if row else b''
+            self._remember(user_id, _digest(blob))
+        return pickle.loads(blob) if blob else {}
+
+    def get_user_data(self):
+        return LazyUserData(_RowLoader(self))
+
+    def update_user_data(self, user_id, data):
+        blob = pickle.dumps(data, pickle.HIGHEST_PROTOCOL) if data else b''
+        digest = _digest(blob)
+        with self._lock:
+            # Users no longer tracked are written unconditionally
+            if self._saved.get(user_id) != digest:
+                self._dirty[user_id] = blob
+            self._remember(user_id, digest)
+
+    def _remember(self, user_id, digest):
+        self._saved[user_id] = digest
+        self._saved.move_to_end(user_id)
+        while len(self._saved) > self.max_tracked:
+            self._saved.popitem(last=False)
+
+    def flush(self):
+        """Write all dirty users in a single transaction."""
+        with self._lock:
+            if not self._dirty:
+                return
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO user_data (user_id, data) VALUES (?, ?)",
+                    [(user_id, blob) for user_id, blob in self._dirty.items() if blob]
+                )
+                self._db.executemany(
+                    "DELETE FROM user_data WHERE user_id = ?",
+                    [(user_id,) for user_id, blob in self._dirty.items() if not blob]
+                )
+            self.rows_written += len(self._dirty)
+            self._dirty = {}
+            self.flushes += 1
+
+    def stats(self):
+        """Return flush counters and the number of loaded and pending users."""
+        with self._lock:
+            return {
+                'flushes': self.flushes,
+                'rows_written': self.rows_written,
+                'tracked_users': len(self._saved),
+                'pending_users': len(self._dirty)
+            }
+
+    def close(self):
+        """Flush pending writes and close the database."""
+        self._stopped.set()
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # The rows stay dirty and are retried on the next flush
+                logger.exception("Failed to flush user data to %s", self.path)
+
+    def get_chat_data(self):
+        return defaultdict(dict)
+
+    def get_bot_data(self):
+        return {}
+
+    def get_conversations(self, name):
+        return {}
+
+    def update_chat_data(self, chat_id, data):
+        pass
+
+    def update_bot_data(self, data):
+        pass
+
+    def update_conversation(self, name, key, new_state):
+        pass
@@ -0,0 +1,55 @@
+import threading
+from io import BytesIO
+
+from PIL import Image
+
+from ascii_converter import FONT_REGISTRY, FontRegistry
+from conversion_pool import _convert_job
+
+
+def test_hits_do_not_wait_on_a_build():
+    registry = FontRegistry(families=())
+    table = {'cached': 'font'}
+    building = threading.Event()
+    release = threading.Event()
+
+    def slow_build():
+        building.set()
+        release.wait(5)
+        return 'built'
+
+    builder = threading.Thread(target=registry._cached, args=(table, 'missing', slow_build))
+    builder.start()
+    try:
+        assert building.wait(5)
+        hit = []
+        reader = threading.Thread(target=lambda: hit.append(registry._cached(table, 'cached', None)))
+        reader.start()
+        reader.join(1)
+        assert hit == ['font']
+    finally:
+        release.set()
+        builder.join()
+    assert table['missing'] == 'built'
+    assert registry.stats()['hits'] == 1 and registry.stats()['misses'] == 1
+
+
+def test_concurrent_builds_keep_the_first_value():
+    registry = FontRegistry(families=())
+    table = {}
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry._cached(table, 'key', object)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(result is table['key'] for result in results)
+
+
+def test_convert_job_reports_the_worker_registry():
+    buffer = BytesIO()
+    Image.new('RGB', (120, 90), (200, 100, 50)).save(buffer, format='PNG')
+    render = _convert_job(buffer.getvalue(), {'width': 60}, 'image')[2]
+    assert render['font_registry'] == FONT_REGISTRY.stats()
+    assert render['font_registry']['fonts'] >= 1
@@ -0,0 +1,43 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+
+from conversion_pool import _convert_job
+from image_intake import ImageIntake, ImageRejected
+
+
+def encode(image, format):
+    """Encode image in format."""
+    buffer = BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('format', ImageIntake.FORMATS)
+def test_supported_formats_pass(format):
+    data = encode(Image.new('RGB', (120, 90), (200, 100, 50)), format)
+    assert ImageIntake().inspect(data, 60) == (120, 90)
+
+
+def test_other_formats_are_rejected_before_decoding():
+    # An EPS sent as a document labelled image/png must never reach Ghostscript
+    data = encode(Image.new('RGB', (120, 90)), 'EPS')
+    with pytest.raises(ImageRejected):
+        ImageIntake().inspect(data, 60)
+    with pytest.raises(UnidentifiedImageError):
+        _convert_job(data, {'width': 60}, 'text')
+
+
+def test_budget_counts_the_rgb_conversion_copy():
+    # 1000x1000 PNGs: RGB decodes to 4 MB, RGBA to 4 MB plus a 4 MB RGB copy
+    intake = ImageIntake(max_decoded_bytes=6 * 1000 * 1000)
+    assert intake.inspect(encode(Image.new('RGB', (1000, 1000)), 'PNG'), 60) == (1000, 1000)
+    assert intake.inspect(encode(Image.new('L', (1000, 1000)), 'PNG'), 60) == (1000, 1000)
+    with pytest.raises(ImageRejected):
+        intake.inspect(encode(Image.new('RGBA', (1000, 1000)), 'PNG'), 60)
+
+
+def test_jpeg_budget_uses_the_draft_scale():
+    assert ImageIntake.decoded_bytes('JPEG', 'RGB', (4000, 3000), 60) == 500 * 375 * 4
+    assert ImageIntake.decoded_bytes('PNG', 'P', (4000, 3000), 60) == 4000 * 3000 * 5
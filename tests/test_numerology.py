@@ -0,0 +1,104 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from hypothesis import example, given, strategies as st
+
+from numerology import (
+    LETTER_VALUES, calculate_destinies, calculate_destiny, calculate_life_path, calculate_life_paths
+)
+
+
+def legacy_life_path(birth_date):
+    """The digit-loop calculate_life_path the lookup tables replaced."""
+    month = birth_date.month
+    day = sum(int(d) for d in str(birth_date.day))
+    year = sum(int(d) for d in str(birth_date.year))
+
+    # First reduction
+    month = sum(int(d) for d in str(month))
+    day = sum(int(d) for d in str(day))
+    year = sum(int(d) for d in str(year))
+
+    # Final reduction
+    total = month + day + year
+    if total in [11, 22]:  # Master Numbers
+        return total
+
+    while total > 9:
+        total = sum(int(d) for d in str(total))
+
+    return total
+
+
+def legacy_destiny_total(full_name):
+    """Letter sum as the digit-loop calculate_destiny computed it."""
+    name = full_name.upper().replace(" ", "")
+    return sum(LETTER_VALUES.get(letter, 0) for letter in name)
+
+
+def legacy_destiny(full_name):
+    """The digit-loop calculate_destiny the lookup tables replaced."""
+    total = legacy_destiny_total(full_name)
+
+    # Reduce to single digit or master number
+    while total > 9 and total not in [11, 22]:
+        total = sum(int(d) for d in str(total))
+
+    return total
+
+
+birth_dates = st.dates(min_value=date(1, 1, 1), max_value=date(9999, 12, 31))
+names = st.text() | st.text(alphabet=st.sampled_from(sorted(LETTER_VALUES) + [' ', '-', "'"]))
+
+# Dates whose reduced month, day and year components total 11, 22 and 29
+MASTER_DATES = [(date(1, 1, 9), 11), (date(4, 9, 9), 22), (date(2999, 9, 9), 29)]
+# Names whose letters total 11, 22, 29 and 38, and one past the destiny lookup table
+MASTER_NAMES = [('Abh', 11), ('Kim G', 22), ('Suzy Qb', 29), ('Zzzz F', 38), ('Z' * 2000, 16000)]
+
+
+@pytest.mark.parametrize('birth_date, total', MASTER_DATES)
+def test_master_date_examples(birth_date, total):
+    components = [sum(int(d) for d in str(sum(int(d) for d in str(part))))
+                  for part in (birth_date.month, birth_date.day, birth_date.year)]
+    assert sum(components) == total
+    assert calculate_life_path(birth_date) == legacy_life_path(birth_date)
+
+
+@pytest.mark.parametrize('name, total', MASTER_NAMES)
+def test_master_name_examples(name, total):
+    assert legacy_destiny_total(name) == total
+    assert calculate_destiny(name) == legacy_destiny(name)
+
+
+@given(birth_dates)
+@example(date(1, 1, 1))
+@example(date(9999, 12, 31))
+def test_life_path_matches_digit_loop(birth_date):
+    assert calculate_life_path(birth_date) == legacy_life_path(birth_date)
+    moment = datetime(birth_date.year, birth_date.month, birth_date.day, 12, 30)
+    assert calculate_life_path(moment) == legacy_life_path(moment)
+
+
+@given(names)
+@example('')
+@example('ß Straße')
+def test_destiny_matches_digit_loop(name):
+    assert calculate_destiny(name) == legacy_destiny(name)
+
+
+@given(st.lists(birth_dates))
+def test_life_paths_match_digit_loop(dates):
+    expected = [legacy_life_path(birth_date) for birth_date in dates]
+    assert calculate_life_paths(np.array(dates, dtype='datetime64[D]')).tolist() == expected
+    assert calculate_life_paths([birth_date.isoformat() for birth_date in dates]).tolist() == expected
+
+
+@given(st.lists(names))
+def test_destinies_match_digit_loop(batch):
+    assert calculate_destinies(batch).tolist() == [legacy_destiny(name) for name in batch]
+
+
+def test_life_paths_reject_years_out_of_range():
+    with pytest.raises(ValueError):
+        calculate_life_paths(np.array(['10000-01-01'], dtype='datetime64[D]'))
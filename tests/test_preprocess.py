@@ -0,0 +1,88 @@
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ascii_converter import ASCIIArtConverter
+
+
+def legacy_preprocess(converter, image):
+    """Preprocessing as it was before the fused pipeline.
+
+    Resizes the same way the converter does, so only the buffer handling is compared.
+    """
+    img = image.convert('RGB') if image.mode != 'RGB' else image
+    img = converter._resize_image(img)
+    img_array = np.array(img, dtype=float)
+    mean = np.mean(img_array)
+    img_array = np.clip(((img_array - mean) * converter.contrast + mean) * converter.brightness, 0, 255)
+    img = Image.fromarray(np.uint8(img_array))
+    original_resized = img.copy()
+    gray = np.array(img.convert('L'))
+    colors = np.array(original_resized.resize(original_resized.size))
+    return colors, gray
+
+
+def sample_photo(width, height):
+    """Deterministic smooth RGB test photo."""
+    x = np.linspace(0, 1, width)[None, :]
+    y = np.linspace(0, 1, height)[:, None]
+    channels = [255 * x + 0 * y, 255 * y + 0 * x, 128 + 127 * np.sin(12 * x + 7 * y)]
+    return Image.fromarray(np.stack(channels, axis=-1).astype(np.uint8), 'RGB')
+
+
+def traced_peak(func):
+    """Peak memory traced by tracemalloc while func runs, in bytes."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('mode', ['RGB', 'L', 'RGBA', 'P'])
+@pytest.mark.parametrize('width, contrast, brightness', [(60, 1.0, 1.0), (200, 1.3, 0.9), (400, 0.6, 1.7)])
+def test_fused_matches_legacy(mode, width, contrast, brightness):
+    photo = sample_photo(1280, 960).convert(mode)
+    converter = ASCIIArtConverter(width=width, contrast=contrast, brightness=brightness)
+    legacy_colors, legacy_gray = legacy_preprocess(converter, photo)
+    colors, gray = converter._prepare_pixels(photo)
+    assert np.array_equal(colors, legacy_colors)
+    assert np.array_equal(gray, legacy_gray)
+
+
+@pytest.mark.parametrize('width', [200, 400])
+def test_fused_traced_peak_is_lower(width):
+    photo = sample_photo(4000, 3000)
+    converter = ASCIIArtConverter(width=width, contrast=1.3, brightness=0.9)
+    legacy = traced_peak(lambda: legacy_preprocess(converter, photo))
+    fused = traced_peak(lambda: converter._prepare_pixels(photo))
+    # The float64 round trip alone needs eight bytes per grid channel
+    assert fused < legacy / 2
+
+
+def jpeg_bytes(width, height):
+    """Encode the sample photo as a JPEG."""
+    buffer = BytesIO()
+    sample_photo(width, height).save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def test_caller_image_is_not_drafted():
+    converter = ASCIIArtConverter(width=60)
+    with Image.open(BytesIO(jpeg_bytes(1600, 1200))) as image:
+        converter.map_grid(image)
+        image.load()
+        assert image.size == (1600, 1200)
+
+
+def test_opened_image_is_drafted(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    path.write_bytes(jpeg_bytes(1600, 1200))
+    converter = ASCIIArtConverter(width=60)
+    with Image.open(path) as image:
+        converter.map_grid(image, draft=True)
+        assert image.size == (200, 150)
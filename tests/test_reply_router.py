@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from reply_router import Prompt, ReplyRouter
+
+
+def message(chat_id, message_id, reply_to=None):
+    return SimpleNamespace(chat_id=chat_id, message_id=message_id, reply_to_message=reply_to)
+
+
+def test_prompts_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'prompts.db')
+    router = ReplyRouter(max_prompts=3)
+    router.open(path)
+    router.expect(message(-100, 1), 'ascii_settings')
+    router.expect(message(7, 2), 'frequency_test', user_id=7, step=3)
+    router.expect(message(7, 3), 'birthday', user_id=7)
+    router.forget(7, 3)
+    router.expect(message(8, 4), 'numerology', user_id=8)
+    router.expect(message(8, 5), 'numerology', user_id=8)
+    router.close()
+
+    restarted = ReplyRouter(max_prompts=2)
+    restarted.open(path)
+    assert restarted.lookup(message(7, 10, message(7, 2))) is None
+    assert restarted.lookup(message(8, 11, message(8, 4))) == Prompt(8, 'numerology', None)
+    assert restarted.lookup(message(8, 12, message(8, 5))) == Prompt(8, 'numerology', None)
+    assert restarted.stats()['prompts'] == 2
+    restarted.close()
+
+    again = ReplyRouter(max_prompts=5)
+    again.open(path)
+    # Prompts evicted on the previous start are gone from the database as well
+    assert again.stats()['prompts'] == 2
+    again.close()
+
+
+def test_route_after_restart(tmp_path):
+    path = str(tmp_path / 'prompts.db')
+    router = ReplyRouter()
+    router.open(path)
+    router.expect(message(7, 2), 'frequency_test', user_id=7, step=3)
+    router.close()
+
+    restarted = ReplyRouter()
+    answers = []
+    restarted.flow('frequency_test')(lambda update, context, prompt: answers.append(prompt))
+    restarted.open(path)
+    update = SimpleNamespace(message=message(7, 9, message(7, 2)), effective_user=SimpleNamespace(id=7))
+    assert restarted.route(update, None)
+    assert answers == [Prompt(7, 'frequency_test', 3)]
+    restarted.close()
@@ -0,0 +1,60 @@
+from concurrent.futures import CancelledError, Future
+
+import pytest
+
+import treeoflifebot
+from result_cache import ResultCache
+from single_flight import SingleFlight
+
+SOURCE = {'cache_key': 'render', 'original_size': (1200, 800), 'bytes': 1000}
+
+
+@pytest.fixture
+def flights(monkeypatch):
+    """Fresh flight table and result cache for the bot's conversion paths."""
+    monkeypatch.setattr(treeoflifebot, 'conversion_flights', SingleFlight())
+    monkeypatch.setattr(treeoflifebot, 'result_cache', ResultCache())
+    return treeoflifebot.conversion_flights
+
+
+def start_flight(flights):
+    """Join the flight as leader and follower and return the leader's job and both waiters."""
+    leader, is_leader = flights.join('render')
+    follower, is_follower = flights.join('render')
+    assert is_leader and not is_follower
+    job = Future()
+    job.add_done_callback(lambda done: treeoflifebot._land_flight('render', done, 'caption', SOURCE))
+    return job, [leader, follower]
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached(flights):
+    job, waiters = start_flight(flights)
+    job.set_exception(ValueError("broken image"))
+    for waiter in waiters:
+        with pytest.raises(ValueError, match="broken image"):
+            waiter.result(timeout=1)
+    assert treeoflifebot.result_cache.get('render') is None
+    assert flights.stats()['in_flight'] == 0
+    # The next request tries again instead of getting the remembered failure
+    assert flights.join('render')[1]
+
+
+def test_cancellation_reaches_every_waiter_and_is_not_cached(flights):
+    job, waiters = start_flight(flights)
+    assert job.cancel()
+    for waiter in waiters:
+        with pytest.raises(CancelledError):
+            waiter.result(timeout=1)
+    assert treeoflifebot.result_cache.get('render') is None
+    assert flights.stats() == {'in_flight': 0, 'leaders': 1, 'coalesced': 1, 'failed': 1}
+
+
+def test_result_is_cached_before_the_flight_ends(flights):
+    job, waiters = start_flight(flights)
+    cached_when_done = []
+    waiters[1].add_done_callback(lambda _: cached_when_done.append(treeoflifebot.result_cache.get('render')))
+    job.set_result(('ascii', b'png', None))
+    for waiter in waiters:
+        assert waiter.result(timeout=1) == (('ascii', b'png', None), 'caption', SOURCE)
+    assert cached_when_done[0]['png'] == b'png'
+    assert flights.stats()['in_flight'] == 0
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from treeoflifebot import TREE_CALENDAR, get_tree, get_trees
+
+
+def linear_get_tree(birth_date):
+    """The linear range scan get_tree used before the day-of-year table."""
+    month, day = birth_date.month, birth_date.day
+
+    for (start_month, start_day), (end_month, end_day) in TREE_CALENDAR.keys():
+        # If start and end months are the same
+        if start_month == end_month:
+            if month == start_month and start_day <= day <= end_day:
+                return TREE_CALENDAR[((start_month, start_day), (end_month, end_day))]
+        # If the date range spans across months
+        elif (month == start_month and day >= start_day) or \
+             (month == end_month and day <= end_day) or \
+             (start_month == 12 and month == 1 and day <= end_day) or \
+             (month > start_month and month < end_month):
+            return TREE_CALENDAR[((start_month, start_day), (end_month, end_day))]
+
+    return "Date not found in Tree of lIfe tree calendar"
+
+
+# Every calendar day, from a leap year so Feb 29 is included
+ALL_DAYS = [datetime(2000, 1, 1) + timedelta(days=index) for index in range(366)]
+
+
+@pytest.mark.parametrize('birth_date', ALL_DAYS, ids=lambda date: date.strftime('%m-%d'))
+def test_get_tree_matches_linear_scan(birth_date):
+    assert get_tree(birth_date) == linear_get_tree(birth_date)
+
+
+@pytest.mark.parametrize('year', [1999, 2000])
+def test_get_trees_matches_linear_scan(year):
+    days = [date.replace(year=year) for date in ALL_DAYS if year == 2000 or (date.month, date.day) != (2, 29)]
+    expected = [linear_get_tree(date) for date in days]
+    assert list(get_trees(days)) == expected
+    assert list(get_trees(np.array(days, dtype='datetime64[D]'))) == expected
+    assert list(get_trees([date.strftime('%Y-%m-%d') for date in days])) == expected
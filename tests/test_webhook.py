@@ -0,0 +1,88 @@
+import json
+import os
+import socket
+import threading
+import urllib.request
+
+import pytest
+from telegram import Bot, User
+from telegram.ext import Updater
+from telegram.utils.request import Request
+
+import treeoflifebot
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'help_command_update.json')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def start_bot(monkeypatch):
+    """Start a webhook-mode updater whose Bot API calls are recorded instead of sent."""
+    updaters = []
+
+    def start(webhook_url=None):
+        monkeypatch.setattr(treeoflifebot, 'WEBHOOK_LISTEN', '127.0.0.1')
+        monkeypatch.setattr(treeoflifebot, 'WEBHOOK_PORT', free_port())
+        monkeypatch.setattr(treeoflifebot, 'WEBHOOK_URL', webhook_url)
+
+        bot_class = Bot if webhook_url else treeoflifebot.LocalWebhookBot
+        bot = bot_class('123:abc', request=Request(con_pool_size=8))
+        bot._bot = User(123, 'Tree of Life', True, username='treeoflifebot')
+        calls = []
+        answered = threading.Event()
+
+        def post(endpoint, data=None, timeout=None, api_kwargs=None):
+            calls.append((endpoint, data))
+            if endpoint == 'setWebhook':
+                return True
+            answered.set()
+            return {'message_id': 32, 'date': 1760800001, 'chat': {'id': data['chat_id'], 'type': 'private'},
+                    'text': data.get('text', '')}
+
+        bot._post = post
+        updater = Updater(bot=bot, workers=2)
+        updaters.append(updater)
+        treeoflifebot.register_handlers(updater.dispatcher)
+        treeoflifebot.start_webhook(updater, 'hook')
+        return f"http://127.0.0.1:{treeoflifebot.WEBHOOK_PORT}/hook", calls, answered
+
+    yield start
+    for updater in updaters:
+        updater.stop()
+
+
+def post_fixture(url):
+    with open(FIXTURE, 'rb') as fixture:
+        body = fixture.read()
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        assert response.status == 200
+    return json.loads(body)
+
+
+def test_recorded_update_reaches_handler(start_bot):
+    url, calls, answered = start_bot()
+    update = post_fixture(url)
+
+    assert answered.wait(5)
+    endpoint, data = calls[0]
+    assert endpoint == 'sendMessage'
+    assert data['chat_id'] == update['message']['chat']['id']
+    assert 'Help Guide' in data['text']
+    # Without WEBHOOK_URL nothing is registered with Telegram
+    assert all(endpoint != 'setWebhook' for endpoint, _ in calls)
+
+
+def test_webhook_url_is_registered(start_bot):
+    url, calls, answered = start_bot('https://bot.example.org/')
+    assert calls[0][0] == 'setWebhook'
+    assert calls[0][1]['url'] == 'https://bot.example.org/hook'
+
+    post_fixture(url)
+    assert answered.wait(5)
+    assert calls[-1][0] == 'sendMessage'
@@ -1,10 +1,14 @@
+import html
 import logging
-from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, CancelledError, TimeoutError, wait
+from datetime import datetime, timedelta
 import os
+import numpy as np
 from PIL import Image, ImageFont
 from dotenv import load_dotenv
 from io import BytesIO
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
+from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto, ReplyKeyboardMarkup, KeyboardButton, ParseMode
+from telegram.error import BadRequest
 from telegram.ext import (
     Updater,
     CommandHandler,
@@ -13,7 +17,21 @@ from telegram.ext import (
     Filters,
     CallbackQueryHandler
 )
+from telegram.utils.helpers import is_local_file
+from telegram.utils.request import Request
 from ascii_converter import ASCIIArtConverter
+from conversion_pool import ConversionPool, ConversionPoolBusy
+from result_cache import ResultCache
+from file_id_store import FileIdStore
+from image_intake import ImageIntake, ImageRejected
+from sqlite_persistence import SQLitePersistence
+from session_store import SessionStore
+from reply_router import ReplyRouter
+from single_flight import SingleFlight
+from album_buffer import AlbumBuffer
+from preview_cache import PreviewCache
+from edit_debouncer import EditDebouncer
+from numerology import calculate_life_path, calculate_destiny
 
 # Load environment variables
 load_dotenv()
@@ -30,9 +48,107 @@ default_ascii_settings = {
     'width': 200,
     'contrast': 1.0,
     'brightness': 1.0,
-    'color_mode': 'true_color'
+    'color_mode': 'true_color',
+    'output': 'image'
 }
 
+# Longest text message Telegram accepts, after entity parsing
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Renderer used for ASCII images ('atlas' or 'text'), switchable for A/B comparisons
+ASCII_RENDERER = os.getenv("ASCII_RENDERER", "atlas")
+
+# Pixel budget of rendered ASCII images; the font size is derived from it per render. The
+# default keeps renders around Telegram's 2560 px photo limit instead of 4800+ px wide
+ASCII_OUTPUT_PIXELS = int(os.getenv("ASCII_OUTPUT_PIXELS", "4000000"))
+
+# Settings menu taps change settings at once; the menu and preview are edited MENU_EDIT_DELAY
+# seconds after the first tap of a burst, showing whatever the settings are by then
+MENU_EDIT_DELAY = float(os.getenv("MENU_EDIT_DELAY", "0.4"))
+menu_edits = EditDebouncer(delay=MENU_EDIT_DELAY)
+
+# Each user's last converted image is kept shrunk to an ASCII_PREVIEW_WIDTH-column grid (the
+# widest menu setting; photos are downloaded at least that big for image replies), so settings changes re-render a preview of at most ASCII_PREVIEW_PIXELS in place
+ASCII_PREVIEW_WIDTH = 400
+ASCII_PREVIEW_PIXELS = int(os.getenv("ASCII_PREVIEW_PIXELS", "1000000"))
+previews = PreviewCache(max_bytes=int(os.getenv("ASCII_PREVIEW_CACHE_MB", "32")) * 1024 * 1024)
+
+# Animated GIFs and videos: widest grid, pixel budget per frame, most frames kept and frame rate
+ASCII_ANIMATION_MAX_WIDTH = int(os.getenv("ASCII_ANIMATION_MAX_WIDTH", "100"))
+ASCII_ANIMATION_PIXELS = int(os.getenv("ASCII_ANIMATION_PIXELS", "200000"))
+ASCII_ANIMATION_MAX_FRAMES = int(os.getenv("ASCII_ANIMATION_MAX_FRAMES", "150"))
+ASCII_ANIMATION_FPS = float(os.getenv("ASCII_ANIMATION_FPS", "15"))
+
+# Worker processes, maximum queued conversions and per-conversion timeout in seconds
+ASCII_WORKERS = int(os.getenv("ASCII_WORKERS", "0")) or None
+ASCII_MAX_PENDING = int(os.getenv("ASCII_MAX_PENDING", "0")) or None
+ASCII_JOB_TIMEOUT = float(os.getenv("ASCII_JOB_TIMEOUT", "60"))
+
+# Created in main() so importing this module does not start worker processes
+conversion_pool = None
+
+# Conversions in progress, keyed like the result cache, so duplicates wait for the first one
+conversion_flights = SingleFlight()
+
+# Albums are collected until no image arrived for ASCII_ALBUM_WINDOW seconds and answered
+# with one media group
+ASCII_ALBUM_WINDOW = float(os.getenv("ASCII_ALBUM_WINDOW", "1.0"))
+albums = AlbumBuffer(window=ASCII_ALBUM_WINDOW)
+
+# Largest upload accepted and most memory a conversion may decode into, checked before decoding
+image_intake = ImageIntake(
+    max_bytes=int(os.getenv("ASCII_MAX_UPLOAD_MB", "20")) * 1024 * 1024,
+    max_decoded_bytes=int(os.getenv("ASCII_MAX_DECODE_MB", "200")) * 1024 * 1024
+)
+
+# Finished renders keyed by source image and settings; the disk tier is enabled by ASCII_CACHE_DIR
+result_cache = ResultCache(
+    max_memory_bytes=int(os.getenv("ASCII_CACHE_MB", "64")) * 1024 * 1024,
+    disk_dir=os.getenv("ASCII_CACHE_DIR"),
+    max_disk_bytes=int(os.getenv("ASCII_CACHE_DISK_MB", "512")) * 1024 * 1024
+)
+
+# Telegram file_ids of uploaded renders, persisted across restarts; opened in main()
+ASCII_FILE_ID_DB = os.getenv("ASCII_FILE_ID_DB", "ascii_file_ids.db")
+ASCII_FILE_ID_MAX = int(os.getenv("ASCII_FILE_ID_MAX", "100000"))
+file_id_store = None
+
+# Per-user state (settings, menus, pending questions) survives restarts in this database;
+# changed users are written every BOT_PERSISTENCE_FLUSH seconds
+BOT_PERSISTENCE_DB = os.getenv("BOT_PERSISTENCE_DB", "treeoflife_user_data.db")
+BOT_PERSISTENCE_FLUSH = float(os.getenv("BOT_PERSISTENCE_FLUSH", "5"))
+
+# In-progress conversations kept in user_data expire after their flow's TTL in seconds;
+# at most SESSION_MAX are kept and expired ones are swept every SESSION_SWEEP_INTERVAL seconds
+SESSION_TTLS = {
+    'numerology_request': 60 * 60,
+    'frequency_test': 60 * 60,
+    'menu_state': 24 * 60 * 60
+}
+SESSION_MAX = int(os.getenv("SESSION_MAX", "50000"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+sessions = SessionStore(SESSION_TTLS, max_sessions=SESSION_MAX)
+
+# Replies are routed to flows by the message_id of the prompt they answer
+reply_router = ReplyRouter(max_prompts=int(os.getenv("REPLY_ROUTER_MAX", "100000")))
+# Prompts are stored here (from main()) so replies still route after a restart
+REPLY_ROUTER_DB = os.getenv("REPLY_ROUTER_DB", "reply_prompts.db")
+
+# How updates arrive: 'polling' (default) or 'webhook'
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+
+# Dispatcher worker threads and HTTP connection pool size for Bot API calls
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "4"))
+BOT_CON_POOL_SIZE = int(os.getenv("BOT_CON_POOL_SIZE", "0")) or BOT_WORKERS + 4
+
+# Webhook listener; WEBHOOK_PATH defaults to the bot token so the endpoint is not guessable.
+# The webhook is only registered with Telegram when WEBHOOK_URL (the public base URL) is set.
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+
 # Initialize ASCII converter with improved settings
 converter = ASCIIArtConverter(
     width=200,
@@ -213,53 +329,6 @@ You have heightened intuitive abilities and spiritual insight. You're here to he
 You have the potential to achieve great things on a large scale. You can turn dreams into reality and create lasting structures. You're innovative and capable of transforming society."""
 }
 
-LETTER_VALUES = {
-    'A': 1, 'J': 1, 'S': 1,
-    'B': 2, 'K': 2, 'T': 2,
-    'C': 3, 'L': 3, 'U': 3,
-    'D': 4, 'M': 4, 'V': 4,
-    'E': 5, 'N': 5, 'W': 5,
-    'F': 6, 'O': 6, 'X': 6,
-    'G': 7, 'P': 7, 'Y': 7,
-    'H': 8, 'Q': 8, 'Z': 8,
-    'I': 9, 'R': 9
-}
-
-def calculate_life_path(birth_date: datetime) -> int:
-    """Calculate Life Path Number from birth date."""
-    month = birth_date.month
-    day = sum(int(d) for d in str(birth_date.day))
-    year = sum(int(d) for d in str(birth_date.year))
-    
-    # First reduction
-    month = sum(int(d) for d in str(month))
-    day = sum(int(d) for d in str(day))
-    year = sum(int(d) for d in str(year))
-    
-    # Final reduction
-    total = month + day + year
-    if total in [11, 22]:  # Master Numbers
-        return total
-    
-    while total > 9:
-        total = sum(int(d) for d in str(total))
-    
-    return total
-
-def calculate_destiny(full_name: str) -> int:
-    """Calculate Destiny Number from full name."""
-    # Remove spaces and convert to uppercase
-    name = full_name.upper().replace(" ", "")
-    
-    # Calculate total
-    total = sum(LETTER_VALUES.get(letter, 0) for letter in name)
-    
-    # Reduce to single digit or master number
-    while total > 9 and total not in [11, 22]:
-        total = sum(int(d) for d in str(total))
-    
-    return total
-
 def num(update: Update, context: CallbackContext):
     """Handle the numerology command."""
     # Delete the command message for privacy
@@ -269,10 +338,10 @@ def num(update: Update, context: CallbackContext):
         pass
 
     # Store user ID and message ID for later deletion
-    context.user_data['numerology_request'] = {
+    sessions.start(context.user_data, update.effective_user.id, 'numerology_request', {
         'user_id': update.effective_user.id,
         'question_message_id': None
-    }
+    })
     
     sent_message = context.bot.send_message(
         chat_id=update.effective_chat.id,
@@ -288,18 +357,15 @@ def num(update: Update, context: CallbackContext):
              "🔒 For privacy, your response will be deleted immediately after processing."
     )
     context.user_data['numerology_request']['question_message_id'] = sent_message.message_id
+    reply_router.expect(sent_message, 'numerology', update.effective_user.id)
 
-def handle_numerology(update: Update, context: CallbackContext):
+@reply_router.flow('numerology')
+def handle_numerology(update: Update, context: CallbackContext, prompt=None):
     """Process numerology calculation request."""
     try:
         # Check if this is a response to a numerology request
-        if 'numerology_request' not in context.user_data or \
-           context.user_data['numerology_request'].get('user_id') != update.effective_user.id or \
-           not update.message.reply_to_message or \
-           update.message.reply_to_message.from_user.id != context.bot.id or \
-           not any(prompt in update.message.reply_to_message.text 
-                  for prompt in ["Numerology Calculator",
-                               "please provide both your birth date"]):
+        if not sessions.active(context.user_data, update.effective_user.id, 'numerology_request') or \
+           context.user_data['numerology_request'].get('user_id') != update.effective_user.id:
             return
             
         # Store message data before deletion
@@ -307,6 +373,7 @@ def handle_numerology(update: Update, context: CallbackContext):
         chat_id = update.effective_chat.id
 
         # Immediately delete the user's response for privacy
+        reply_router.forget(chat_id, update.message.reply_to_message.message_id)
         try:
             update.message.delete()
             update.message.reply_to_message.delete()
@@ -374,31 +441,69 @@ def handle_numerology(update: Update, context: CallbackContext):
             )
             
     except ValueError as e:
-        update.message.reply_text(
+        sent_message = update.message.reply_text(
             "Please use the correct format:\n"
             "1. Full reading: DD/MM/YYYY, Full Name\n"
             "2. Life Path only: DD/MM/YYYY\n"
             "3. Destiny only: Your Full Name"
         )
+        reply_router.expect(sent_message, 'numerology', update.effective_user.id)
     except Exception as e:
         update.message.reply_text(f"Sorry, there was an error: {str(e)}")
 
+# Returned for days no TREE_CALENDAR range covers
+TREE_NOT_FOUND = "Date not found in Tree of lIfe tree calendar"
+
+def _range_contains(date_range: tuple, month: int, day: int) -> bool:
+    """Check whether a month/day falls in a TREE_CALENDAR date range."""
+    (start_month, start_day), (end_month, end_day) = date_range
+    # If start and end months are the same
+    if start_month == end_month:
+        return month == start_month and start_day <= day <= end_day
+    # If the date range spans across months
+    return (month == start_month and day >= start_day) or \
+           (month == end_month and day <= end_day) or \
+           (start_month == 12 and month == 1 and day <= end_day) or \
+           (month > start_month and month < end_month)
+
+def _compile_tree_calendar():
+    """Compile TREE_CALENDAR into one reading per tree and a leap-year day-of-year table of tree IDs (-1 when none matches)."""
+    readings = []
+    tree_ids = {}
+    for reading in TREE_CALENDAR.values():
+        if reading not in tree_ids:
+            tree_ids[reading] = len(readings)
+            readings.append(reading)
+    
+    tree_by_day = np.full(366, -1, dtype=np.int16)
+    for index in range(366):
+        date = datetime(2000, 1, 1) + timedelta(days=index)
+        for date_range, reading in TREE_CALENDAR.items():
+            if _range_contains(date_range, date.month, date.day):
+                tree_by_day[index] = tree_ids[reading]
+                break
+    
+    return np.array(readings + [TREE_NOT_FOUND], dtype=object), tree_by_day
+
+# Reading text per tree ID (last entry: TREE_NOT_FOUND) and tree ID per leap-year day
+TREE_READINGS, TREE_BY_DAY = _compile_tree_calendar()
+
+# Leap-year day-of-year index of the first day of each month
+MONTH_DAY_OFFSETS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
 def get_tree(birth_date: datetime) -> str:
-    month, day = birth_date.month, birth_date.day
-    
-    for (start_month, start_day), (end_month, end_day) in TREE_CALENDAR.keys():
-        # If start and end months are the same
-        if start_month == end_month:
-            if month == start_month and start_day <= day <= end_day:
-                return TREE_CALENDAR[((start_month, start_day), (end_month, end_day))]
-        # If the date range spans across months
-        elif (month == start_month and day >= start_day) or \
-             (month == end_month and day <= end_day) or \
-             (start_month == 12 and month == 1 and day <= end_day) or \
-             (month > start_month and month < end_month):
-            return TREE_CALENDAR[((start_month, start_day), (end_month, end_day))]
-    
-    return "Date not found in Tree of lIfe tree calendar"
+    """Get the Celtic tree reading for a birth date."""
+    return TREE_READINGS[TREE_BY_DAY[MONTH_DAY_OFFSETS[birth_date.month - 1] + birth_date.day - 1]]
+
+def get_trees(dates) -> np.ndarray:
+    """Get the Celtic tree readings for an array-like of birth dates, as an object array of the same shape."""
+    dates = np.asarray(dates)
+    if not np.issubdtype(dates.dtype, np.datetime64):
+        dates = dates.astype('datetime64[D]')
+    month_starts = dates.astype('datetime64[M]')
+    months = month_starts.astype(np.int64) % 12
+    days = (dates.astype('datetime64[D]') - month_starts).astype(np.int64)
+    return TREE_READINGS[TREE_BY_DAY[MONTH_DAY_OFFSETS[months] + days]]
 
 def bday(update: Update, context: CallbackContext):
     # Check if date was provided with command
@@ -417,22 +522,16 @@ def bday(update: Update, context: CallbackContext):
                 "Please use the correct format: /bday DD/MM (e.g., /bday 25/12) or reply with just DD/MM"
             )
     else:
-        update.message.reply_text(
+        sent_message = update.message.reply_text(
             "🌳 Welcome to the Sacred Tree of Life Personality Bot! 🌳\n"
             "Please reply to this message with your birthday in DD/MM format (e.g., 25/12 for December 25th)\n"
             "Or use the command format: /bday DD/MM (e.g., /bday 25/12)"
         )
+        reply_router.expect(sent_message, 'birthday', update.effective_user.id)
 
-def handle_birthday(update: Update, context: CallbackContext):
+@reply_router.flow('birthday')
+def handle_birthday(update: Update, context: CallbackContext, prompt=None):
     """Handle birthday input for tree personality."""
-    # Check if the message is a reply to the bot's birthday prompt
-    if not update.message.reply_to_message or \
-       update.message.reply_to_message.from_user.id != context.bot.id or \
-       not any(prompt in update.message.reply_to_message.text 
-              for prompt in ["Please reply to this message with your birthday",
-                           "send your birthday in the correct format"]):
-        return
-        
     try:
         # Parse the date
         day, month = map(int, update.message.text.split('/'))
@@ -442,6 +541,7 @@ def handle_birthday(update: Update, context: CallbackContext):
         tree = get_tree(birth_date)
         
         # Delete the user's message and the prompt for cleanliness
+        reply_router.forget(update.effective_chat.id, update.message.reply_to_message.message_id)
         try:
             update.message.delete()
             update.message.reply_to_message.delete()
@@ -456,9 +556,10 @@ def handle_birthday(update: Update, context: CallbackContext):
             reply_markup=InlineKeyboardMarkup(main_menu_button)
         )
     except ValueError:
-        update.message.reply_text(
+        sent_message = update.message.reply_text(
             "Please send your birthday in the correct format: DD/MM (e.g., 25/12 for December 25th)"
         )
+        reply_router.expect(sent_message, 'birthday', update.effective_user.id)
     except Exception as e:
         update.message.reply_text(
             "Sorry, there was an error processing your birthday. Please try again."
@@ -493,12 +594,12 @@ def interpret_frequency_answers(answers: dict) -> str:
 def vibe(update: Update, context: CallbackContext):
     """Start the frequency healing test."""
     # Initialize user data for the test
-    context.user_data['frequency_test'] = {
+    sessions.start(context.user_data, update.effective_user.id, 'frequency_test', {
         'current_question': 1,
         'answers': {},
         'user_id': update.effective_user.id,  # Store the user ID who started the test
         'last_question_message_id': None  # Track the last question message ID
-    }
+    })
     
     # Send the first question
     question_data = FREQUENCY_QUESTIONS[1]
@@ -512,26 +613,32 @@ def vibe(update: Update, context: CallbackContext):
             "Answer each question by replying with a single letter (a, b, c, or d).\n\n" + message
     )
     context.user_data['frequency_test']['last_question_message_id'] = sent_message.message_id
+    reply_router.expect(sent_message, 'frequency_test', update.effective_user.id, step=1)
 
-def handle_frequency_answer(update: Update, context: CallbackContext):
+@reply_router.flow('frequency_test')
+def handle_frequency_answer(update: Update, context: CallbackContext, prompt=None):
     """Handle answers for the frequency test."""
     # Check if user is in the middle of a test and is authorized
-    if 'frequency_test' not in context.user_data or \
-       context.user_data['frequency_test'].get('user_id') != update.effective_user.id or \
-       not update.message.reply_to_message or \
-       update.message.reply_to_message.from_user.id != context.bot.id:
+    if not sessions.active(context.user_data, update.effective_user.id, 'frequency_test') or \
+       context.user_data['frequency_test'].get('user_id') != update.effective_user.id:
+        return
+
+    # Ignore replies to questions that were already answered
+    current_q = context.user_data['frequency_test']['current_question']
+    if prompt is not None and prompt.step != current_q:
         return
 
     answer = update.message.text.lower().strip()
     if answer not in ['a', 'b', 'c', 'd']:
-        update.message.reply_text("Please answer with a single letter: a, b, c, or d")
+        sent_message = update.message.reply_text("Please answer with a single letter: a, b, c, or d")
+        reply_router.expect(sent_message, 'frequency_test', update.effective_user.id, step=current_q)
         return
 
-    current_q = context.user_data['frequency_test']['current_question']
     context.user_data['frequency_test']['answers'][current_q] = answer
 
     # Delete the previous question message if it exists
     if context.user_data['frequency_test']['last_question_message_id']:
+        reply_router.forget(update.effective_chat.id, context.user_data['frequency_test']['last_question_message_id'])
         try:
             context.bot.delete_message(
                 chat_id=update.effective_chat.id,
@@ -562,6 +669,7 @@ def handle_frequency_answer(update: Update, context: CallbackContext):
             text=message
         )
         context.user_data['frequency_test']['last_question_message_id'] = sent_message.message_id
+        reply_router.expect(sent_message, 'frequency_test', update.effective_user.id, step=next_q)
     else:
         # Test is complete, interpret results
         result = interpret_frequency_answers(context.user_data['frequency_test']['answers'])
@@ -570,39 +678,19 @@ def handle_frequency_answer(update: Update, context: CallbackContext):
             text=result
         )
         # Clear test data
-        del context.user_data['frequency_test']
+        sessions.end(context.user_data, update.effective_user.id, 'frequency_test')
 
 def handle_messages(update: Update, context: CallbackContext):
-    """Route messages to appropriate handlers based on context."""
-    # Only process messages that are direct replies to the bot's messages
-    if not update.message.reply_to_message or \
-       update.message.reply_to_message.from_user.id != context.bot.id:
-        return
-
-    # Check if this is a reply to a specific prompt
-    reply_text = update.message.reply_to_message.text
-    
-    if 'frequency_test' in context.user_data and \
-       context.user_data['frequency_test'].get('user_id') == update.effective_user.id:
-        handle_frequency_answer(update, context)
-    elif 'numerology_request' in context.user_data and \
-         context.user_data['numerology_request'].get('user_id') == update.effective_user.id and \
-         ("Numerology Calculator" in reply_text or "please provide both your birth date" in reply_text):
-        handle_numerology(update, context)
-    elif "Please reply to this message with your birthday" in reply_text or \
-         "send your birthday in the correct format" in reply_text:
-        handle_birthday(update, context)
-    else:
-        # If it's not a reply to any specific prompt, ignore it
-        return
+    """Route replies to the flow whose prompt they answer."""
+    reply_router.route(update, context)
 
 def tree(update: Update, context: CallbackContext):
     """Send a welcome message with the main menu when the command /tree is issued."""
     # Store user ID and last message ID for management
-    context.user_data['menu_state'] = {
+    sessions.start(context.user_data, update.effective_user.id, 'menu_state', {
         'user_id': update.effective_user.id,
         'last_message_id': None
-    }
+    })
     
     main_menu_keyboard = [
         [
@@ -652,78 +740,493 @@ def tree(update: Update, context: CallbackContext):
 
 def handle_photo(update: Update, context: CallbackContext):
     """Handle photo messages."""
-    chat_id = update.effective_chat.id
+    settings = _ascii_request_settings(update, context)
+    if settings is None:
+        return
+    
+    # Get the smallest photo variant with enough pixels for the character grid, and for the
+    # ASCII_PREVIEW_WIDTH-column preview source kept with image replies
+    largest = update.message.photo[-1]
+    width = settings['width']
+    if not _reply_as_text(settings, (largest.width, largest.height)):
+        width = max(width, ASCII_PREVIEW_WIDTH)
+    photo = _pick_photo_size(update.message.photo, width)
+    _convert_media(update, context, settings, photo, (largest.width, largest.height), largest.file_size)
+
+def handle_image_document(update: Update, context: CallbackContext):
+    """Handle images sent as files, which arrive without Telegram's photo compression."""
+    settings = _ascii_request_settings(update, context)
+    if settings is None:
+        return
     
+    # Documents carry no dimensions, they are read from the header after downloading
+    document = update.message.document
+    _convert_media(update, context, settings, document, None, document.file_size)
+
+def handle_animation(update: Update, context: CallbackContext):
+    """Handle animated GIFs and videos, replying with an animated ASCII GIF."""
+    settings = _ascii_request_settings(update, context)
+    if settings is None:
+        return
+    
+    clip = update.message.animation or update.message.video
+    try:
+        image_intake.check_declared(clip.file_size)
+    except ImageRejected as e:
+        logger.info(f"Rejected clip before download: {str(e)}")
+        update.message.reply_text(str(e))
+        return
+    
+    processing_message = update.message.reply_text("Processing your animation... 🎞️")
+    try:
+        # The whole clip is converted in a worker process; frames are streamed there
+        future = conversion_pool.submit_animation(_download(clip), {
+            'width': min(settings['width'], ASCII_ANIMATION_MAX_WIDTH),
+            'contrast': settings['contrast'],
+            'brightness': settings['brightness'],
+            'color_mode': settings['color_mode'],
+            'output_pixels': ASCII_ANIMATION_PIXELS,
+            'max_frames': ASCII_ANIMATION_MAX_FRAMES,
+            'max_fps': ASCII_ANIMATION_FPS
+        })
+    except ConversionPoolBusy:
+        logger.warning("Conversion pool is full, rejecting animation")
+        update.message.reply_text(
+            "I'm busy converting other images right now. Please send your animation again in a minute! ⏳"
+        )
+        _delete_quietly(processing_message)
+        return
+    except Exception as e:
+        error_message = f"Sorry, there was an error processing your animation: {str(e)}"
+        logger.error(f"Error in handle_animation: {str(e)}")
+        update.message.reply_text(error_message)
+        _delete_quietly(processing_message)
+        return
+    
+    caption = f"Here's your ASCII animation! 🎞️\n{_ascii_settings_line(settings)}"
+    future.add_done_callback(
+        lambda done: context.dispatcher.run_async(_send_animation_result, update, done, caption, processing_message)
+    )
+
+def _send_animation_result(update: Update, future, caption: str, processing_message):
+    """Reply with a finished animation conversion, or explain why it failed."""
+    try:
+        gif_bytes, stats = future.result()
+        logger.info(
+            f"Animated {stats['frames']} of {stats['source_frames']} frames at {stats['size'][0]}x{stats['size'][1]}: "
+            f"{stats['frames_per_second']:.0f} frames/s, {stats['reused_cells']:.0%} of cells reused, "
+            f"GIF encoded in {stats['encode_ms']:.0f} ms, {stats['bytes']} bytes"
+        )
+        update.message.reply_animation(animation=BytesIO(gif_bytes), filename='ascii_art.gif', caption=caption)
+    except TimeoutError:
+        logger.warning("ASCII animation timed out")
+        update.message.reply_text("Sorry, your animation took too long to convert. Try a shorter clip! ⏳")
+    except Exception as e:
+        error_message = f"Sorry, there was an error processing your animation: {str(e)}"
+        logger.error(f"Error in handle_animation: {str(e)}")
+        update.message.reply_text(error_message)
+    finally:
+        _delete_quietly(processing_message)
+
+def _ascii_request_settings(update: Update, context: CallbackContext):
+    """Return the user's ASCII settings if this image should be converted, otherwise None."""
     # Check if this is a private chat or a reply to our ASCII settings menu
     is_private = update.effective_chat.type == "private"
-    is_reply_to_settings = (
-        update.message.reply_to_message and
-        update.message.reply_to_message.from_user.id == context.bot.id and
-        "ASCII Art Converter Settings" in update.message.reply_to_message.text
-    )
+    prompt = reply_router.lookup(update.message)
+    is_reply_to_settings = prompt is not None and prompt.flow == 'ascii_settings'
+    # Only an album's first message carries the reply, the rest follow it
+    group_id = update.message.media_group_id
+    in_album = group_id is not None and albums.collecting(group_id)
     
     # Only process if it's a private chat or a reply to our settings menu
-    if not (is_private or is_reply_to_settings):
-        return
+    if not (is_private or is_reply_to_settings or in_album):
+        return None
     
     # Get user settings from context
     if 'ascii_settings' not in context.user_data:
         context.user_data['ascii_settings'] = default_ascii_settings.copy()
     
-    settings = context.user_data['ascii_settings']
+    return context.user_data['ascii_settings']
+
+def _convert_media(update: Update, context: CallbackContext, settings: dict, media, original_size, original_bytes):
+    """Reply with the ASCII art of a photo or image document, from the caches when possible."""
+    text_mode = settings.get('output', 'image') == 'text'
+    
+    # Album images are converted together once the whole album has arrived (text replies
+    # cannot be sent as a media group, so those are still answered one by one)
+    group_id = update.message.media_group_id
+    if group_id is not None and not text_mode:
+        if albums.add(group_id, (update, settings, media, original_size, original_bytes)):
+            context.job_queue.run_once(_flush_album, albums.window, context=group_id)
+        return
+    
+    cache_key, text_key = _ascii_cache_keys(media, settings)
+    # Photos report their size, so whether a text reply fits is known before any lookup;
+    # a document's is not, so in text mode it may still be answered with a cached image
+    send_text = _reply_as_text(settings, original_size) if original_size else text_mode
+    may_send_image = not send_text or original_size is None
+    
+    # Text replies were converted before, so resend the cached text block
+    cached = result_cache.get(text_key) if send_text else None
+    if cached is not None:
+        orig_width, orig_height = original_size or cached['original_size']
+        settings['original_aspect_ratio'] = orig_height / orig_width
+        logger.info(f"ASCII result cache hit: {result_cache.stats()}")
+        update.message.reply_text(_ascii_text_block(cached['ascii_str']), parse_mode=ParseMode.HTML)
+        # Settings changes must not edit the reply to an older image
+        previews.discard(update.effective_user.id)
+        return
+    
+    # The same render was uploaded before, so resend it by file_id without uploading
+    sent_before = file_id_store.get(cache_key) if file_id_store and may_send_image else None
+    if sent_before is not None and not _reply_as_text(settings, original_size or sent_before['original_size']):
+        orig_width, orig_height = original_size or sent_before['original_size']
+        settings['original_aspect_ratio'] = orig_height / orig_width
+        try:
+            sent = update.message.reply_photo(
+                photo=sent_before['file_id'],
+                caption=_image_caption(settings, orig_width, orig_height)
+            )
+            logger.info(f"ASCII file_id reuse: {file_id_store.stats()}")
+            _retarget_preview(update, media, sent, settings)
+            return
+        except BadRequest as e:
+            # Telegram no longer accepts this file_id, fall back to sending the render again
+            logger.warning(f"Stale file_id for cached render: {str(e)}")
+            file_id_store.discard(cache_key)
+    
+    # Identical source and settings were converted before, so reply straight from the cache
+    cached = result_cache.get(cache_key) if may_send_image else None
+    if cached is not None and not _reply_as_text(settings, original_size or cached['original_size']):
+        orig_width, orig_height = original_size or cached['original_size']
+        settings['original_aspect_ratio'] = orig_height / orig_width
+        logger.info(f"ASCII result cache hit: {result_cache.stats()}")
+        try:
+            sent = _upload_render(update, cache_key, cached['png'], (orig_width, orig_height),
+                                  _image_caption(settings, orig_width, orig_height))
+            _retarget_preview(update, media, sent, settings)
+        except Exception as e:
+            error_message = f"Sorry, there was an error processing your image: {str(e)}"
+            logger.error(f"Error in handle_photo: {str(e)}")
+            update.message.reply_text(error_message)
+        return
     
-    # Get the largest photo
-    photo = update.message.photo[-1]
+    # Refuse oversized files before downloading them
+    try:
+        image_intake.check_declared(media.file_size)
+    except ImageRejected as e:
+        logger.info(f"Rejected upload before download: {str(e)}")
+        update.message.reply_text(str(e))
+        return
     
     # Send processing message
     processing_message = update.message.reply_text("Processing your image... 🎨")
     
+    # Identical requests (same image and settings) already in progress share that conversion
+    flight_key = text_key if send_text else cache_key
+    flight, leader = conversion_flights.join(flight_key)
+    # Reply from the dispatcher's thread pool once the conversion is done
+    flight.add_done_callback(
+        lambda done: context.dispatcher.run_async(_send_ascii_result, update, done, processing_message)
+    )
+    if not leader:
+        logger.info(f"Joined in-flight conversion: {conversion_flights.stats()}")
+        return
+    
     try:
-        # Get the file
-        file = photo.get_file()
-        photo_bytes = file.download_as_bytearray()
-        
-        # Create PIL Image from bytes
-        image = Image.open(BytesIO(photo_bytes))
-        
-        # Store original dimensions in settings
-        orig_width, orig_height = image.size
-        settings['original_aspect_ratio'] = orig_height / orig_width
+        _start_conversion(settings, media, original_size, original_bytes, flight_key, cache_key, text_key)
+    except Exception as e:
+        # Every request waiting on this flight gets the error, and the next one tries again
+        conversion_flights.finish(flight_key, exception=e)
+
+def _retarget_preview(update: Update, media, sent, settings: dict):
+    """Point settings previews at a reply sent from the caches, or stop them if another image is cached."""
+    previews.retarget(update.effective_user.id, media.file_unique_id, sent.chat_id, sent.message_id, _preview_key(settings))
+
+def _ascii_cache_keys(media, settings: dict):
+    """Return the result cache keys of a photo or document's image render and text render."""
+    cache_key = ResultCache.key(
+        media.file_unique_id, settings['width'], settings['contrast'],
+        settings['brightness'], settings['color_mode'], ASCII_RENDERER, ASCII_OUTPUT_PIXELS
+    )
+    text_key = ResultCache.key(
+        media.file_unique_id, settings['width'], settings['contrast'],
+        settings['brightness'], settings['color_mode'], 'text'
+    )
+    return cache_key, text_key
+
+def _reply_as_text(settings: dict, original_size) -> bool:
+    """Return whether a conversion of an image of original_size is answered with a text message."""
+    # Text replies skip rendering entirely, as long as the grid fits in one message
+    columns, rows = ASCIIArtConverter.grid_size(settings['width'], original_size)
+    return settings.get('output', 'image') == 'text' and (columns + 1) * rows - 1 <= TELEGRAM_MESSAGE_LIMIT
+
+def _start_conversion(settings: dict, media, original_size, original_bytes, flight_key: str, cache_key: str, text_key: str):
+    """Download media, check it and queue its conversion, returning the worker's future; raises when rejected or busy."""
+    # Get the file and check its header against the pixel budget before any decoding
+    media_bytes = _download(media)
+    # Image replies are also decoded large enough for the preview source
+    decode_width = settings['width']
+    if not (original_size and _reply_as_text(settings, original_size)):
+        decode_width = max(decode_width, ASCII_PREVIEW_WIDTH)
+    downloaded_size = image_intake.inspect(media_bytes, decode_width)
+    orig_width, orig_height = original_size or downloaded_size
+    saved = (original_bytes or 0) - len(media_bytes)
+    logger.info(
+        f"Downloaded {downloaded_size[0]}x{downloaded_size[1]} image ({len(media_bytes)} bytes), "
+        f"{saved} bytes saved over the {orig_width}x{orig_height} original"
+    )
+    settings['original_aspect_ratio'] = orig_height / orig_width
+    
+    send_text = _reply_as_text(settings, (orig_width, orig_height))
+    
+    # Convert in a worker process so the dispatcher stays free for other updates
+    future = conversion_pool.submit(media_bytes, {
+        'width': settings['width'],
+        'contrast': settings['contrast'],
+        'brightness': settings['brightness'],
+        'color_mode': settings['color_mode'],
+        'renderer': ASCII_RENDERER,
+        'output_pixels': ASCII_OUTPUT_PIXELS
+    }, output='text' if send_text else 'both', preview_width=None if send_text else ASCII_PREVIEW_WIDTH)
+    
+    caption = _image_caption(settings, orig_width, orig_height)
+    source = {
+        'cache_key': text_key if send_text else cache_key,
+        'original_size': (orig_width, orig_height),
+        'bytes': len(media_bytes),
+        'preview_key': _preview_key(settings),
+        'source_id': media.file_unique_id
+    }
+    future.add_done_callback(lambda done: _land_flight(flight_key, done, caption, source))
+    return future
+
+def _land_flight(flight_key: str, job, caption: str, source: dict):
+    """End a conversion's flight with the worker's result, or its failure or cancellation."""
+    if job.cancelled():
+        conversion_flights.finish(flight_key, exception=CancelledError())
+    elif job.exception() is not None:
+        conversion_flights.finish(flight_key, exception=job.exception())
+    else:
+        ascii_str, png_bytes, render = job.result()
+        if render is not None:
+            logger.info(
+                f"Rendered {render['size'][0]}x{render['size'][1]} at font size {render['font_size']}: "
+                f"PNG encoded in {render['encode_ms']:.1f} ms, {render['bytes']} bytes, "
+                f"worker font registry {render['font_registry']}"
+            )
+        # Cached before the flight ends, so requests arriving while its replies are queued hit the cache
+        try:
+            result_cache.put(source['cache_key'], ascii_str, png_bytes or b'', source['original_size'], source['bytes'])
+        except Exception as e:
+            logger.error(f"Could not cache conversion result: {str(e)}")
+        conversion_flights.finish(flight_key, result=(job.result(), caption, source))
+
+def _flush_album(context: CallbackContext):
+    """Convert the album collected under the job's media_group_id once no more images arrive."""
+    group_id = context.job.context
+    wait_left = albums.wait_left(group_id)
+    if wait_left > 0:
+        context.job_queue.run_once(_flush_album, wait_left, context=group_id)
+        return
+    items = albums.take(group_id)
+    if items:
+        items.sort(key=lambda item: item[0].message.message_id)
+        context.dispatcher.run_async(_convert_album, items)
+
+def _convert_album(items: list, reuse_file_ids: bool = True):
+    """Convert an album's (update, settings, media, original_size, original_bytes) items as one batch and reply with one media group."""
+    first_update, settings = items[0][0], items[0][1]
+    processing_message = first_update.message.reply_text(f"Processing your {len(items)} images... 🎨")
+    logger.info(f"Converting album of {len(items)} images: {albums.stats()}")
+    # The album reply is not previewed, so settings changes must not edit an older reply
+    previews.discard(first_update.effective_user.id)
+    retry = False
+    
+    try:
+        # Start every conversion first, then collect the results in album order
+        slots = []
+        running = []
+        for _, _, media, original_size, original_bytes in items:
+            cache_key, text_key = _ascii_cache_keys(media, settings)
+            # Renders uploaded before are resent by file_id without uploading
+            sent_before = file_id_store.get(cache_key) if file_id_store and reuse_file_ids else None
+            if sent_before is not None:
+                slots.append({'cache_key': cache_key, 'file_id': sent_before['file_id'],
+                              'original_size': sent_before['original_size']})
+                continue
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                slots.append({'cache_key': cache_key, 'png': cached['png'], 'original_size': cached['original_size']})
+                continue
+            
+            flight, leader = conversion_flights.join(cache_key)
+            slots.append({'cache_key': cache_key, 'flight': flight})
+            if not leader:
+                continue
+            # One conversion per worker at a time, so an album does not fill the pool's backlog
+            running = [future for future in running if not future.done()]
+            if len(running) >= conversion_pool.workers:
+                wait(running, return_when=FIRST_COMPLETED)
+            try:
+                image_intake.check_declared(media.file_size)
+                running.append(
+                    _start_conversion(settings, media, original_size, original_bytes, cache_key, cache_key, text_key)
+                )
+            except Exception as e:
+                conversion_flights.finish(cache_key, exception=e)
         
-        # Create converter with current settings
-        converter = ASCIIArtConverter(
-            width=settings['width'],
-            contrast=settings['contrast'],
-            brightness=settings['brightness'],
-            color_mode=settings['color_mode']
-        )
+        converted = []
+        for slot in slots:
+            if 'flight' in slot:
+                try:
+                    (_, png_bytes, _), _, source = slot['flight'].result()
+                except Exception as e:
+                    logger.info(f"Album image not converted: {str(e)}")
+                    continue
+                slot.update(png=png_bytes, original_size=source['original_size'])
+            converted.append(slot)
         
-        # Convert image
-        ascii_str, ascii_image = converter.convert(image)
+        if not converted:
+            first_update.message.reply_text("Sorry, none of the images in your album could be converted.")
+            return
+        try:
+            _reply_photos(first_update, converted, _album_caption(settings, len(converted), len(slots) - len(converted)))
+        except BadRequest as e:
+            stale = [slot['cache_key'] for slot in converted if 'file_id' in slot]
+            if not stale:
+                raise
+            # Telegram no longer accepts one of the file_ids, so send the album again without them
+            logger.warning(f"Stale file_id in album: {str(e)}")
+            for cache_key in stale:
+                file_id_store.discard(cache_key)
+            retry = True
+    except Exception as e:
+        error_message = f"Sorry, there was an error processing your album: {str(e)}"
+        logger.error(f"Error in _convert_album: {str(e)}")
+        first_update.message.reply_text(error_message)
+    finally:
+        _delete_quietly(processing_message)
+    if retry:
+        _convert_album(items, reuse_file_ids=False)
+
+def _reply_photos(update: Update, renders: list, caption: str):
+    """Reply with rendered PNGs or known file_ids as media groups of up to 10, captioned on the first image."""
+    for start in range(0, len(renders), 10):
+        chunk = renders[start:start + 10]
+        chunk_caption = caption if start == 0 else None
+        photos = [render['file_id'] if 'file_id' in render else BytesIO(render['png']) for render in chunk]
+        if len(chunk) == 1:
+            # Media groups need at least two items
+            sent = [update.message.reply_photo(photo=photos[0], caption=chunk_caption)]
+        else:
+            sent = update.message.reply_media_group([
+                InputMediaPhoto(photo, caption=chunk_caption if index == 0 else None)
+                for index, photo in enumerate(photos)
+            ])
+        if file_id_store:
+            for message, render in zip(sent, chunk):
+                if 'file_id' in render:
+                    continue
+                file_id_store.put(render['cache_key'], message.photo[-1].file_id, render['original_size'], len(render['png']))
+
+def _pick_photo_size(photos: list, width: int):
+    """Pick the smallest PhotoSize with at least one pixel per character grid cell, or the largest one."""
+    largest = photos[-1]
+    columns, rows = ASCIIArtConverter.grid_size(width, (largest.width, largest.height))
+    for photo in sorted(photos, key=lambda p: p.width * p.height):
+        if photo.width >= columns and photo.height >= rows:
+            return photo
+    return largest
+
+def _download(media) -> bytes:
+    """Download a photo, document or clip and return its bytes."""
+    file = media.get_file()
+    # The retrieved bytes are used as they are; download_as_bytearray() would copy them
+    if is_local_file(file.file_path):
+        with open(file.file_path, 'rb') as local_file:
+            return local_file.read()
+    return file.bot.request.retrieve(file.file_path)
+
+def _ascii_caption(settings: dict, orig_width: int, orig_height: int) -> str:
+    """Build the caption sent with an ASCII render."""
+    return f"Here's your ASCII art! 🎨\nOriginal size: {orig_width}x{orig_height}\n{_ascii_settings_line(settings)}"
+
+def _image_caption(settings: dict, orig_width: int, orig_height: int) -> str:
+    """Build the caption sent with an ASCII image, explaining it when text was asked for."""
+    caption = _ascii_caption(settings, orig_width, orig_height)
+    if settings.get('output', 'image') == 'text':
+        caption += "\n(Too big for a text message at this width, so here's the image!)"
+    return caption
+
+def _album_caption(settings: dict, converted: int, failed: int) -> str:
+    """Build the caption sent with an album of ASCII renders."""
+    caption = f"Here's your ASCII art album! 🎨\n{converted} images\n{_ascii_settings_line(settings)}"
+    if failed:
+        caption += f"\n({failed} image{'s' if failed > 1 else ''} couldn't be converted)"
+    return caption
+
+def _ascii_settings_line(settings: dict) -> str:
+    """Describe the settings a render was made with."""
+    return (
+        f"Settings: Width={settings['width']}, Contrast={settings['contrast']:.1f}, "
+        f"Brightness={settings['brightness']:.1f}, Mode={settings['color_mode']}"
+    )
+
+def _ascii_text_block(ascii_str: str) -> str:
+    """Format ASCII art as an HTML monospace block."""
+    return f"<pre>{html.escape(ascii_str, quote=False)}</pre>"
+
+def _upload_render(update: Update, cache_key: str, png_bytes: bytes, original_size: tuple, caption: str):
+    """Upload a rendered PNG as a reply, record its file_id for identical requests and return it."""
+    sent = update.message.reply_photo(photo=BytesIO(png_bytes), caption=caption)
+    if file_id_store:
+        file_id_store.put(cache_key, sent.photo[-1].file_id, original_size, len(png_bytes))
+    return sent
+
+def _send_ascii_result(update: Update, flight, processing_message):
+    """Reply with a finished conversion, or explain why it failed."""
+    try:
+        (ascii_str, png_bytes, render), caption, source = flight.result()
         
-        # Convert ASCII image to bytes for sending
-        img_byte_arr = BytesIO()
-        ascii_image.save(img_byte_arr, format='PNG')
-        img_byte_arr.seek(0)
+        if png_bytes is None:
+            # Text-only conversion
+            update.message.reply_text(_ascii_text_block(ascii_str), parse_mode=ParseMode.HTML)
+            previews.discard(update.effective_user.id)
+            return
         
-        # Send the ASCII image
-        update.message.reply_photo(
-            photo=img_byte_arr,
-            caption=f"Here's your ASCII art! 🎨\nOriginal size: {orig_width}x{orig_height}\n"
-                   f"Settings: Width={settings['width']}, Contrast={settings['contrast']:.1f}, "
-                   f"Brightness={settings['brightness']:.1f}, Mode={settings['color_mode']}"
+        # Send the ASCII image, which settings changes then update in place
+        sent = _upload_render(update, source['cache_key'], png_bytes, source['original_size'], caption)
+        if 'preview_source' in render:
+            previews.put(
+                update.effective_user.id, render['preview_source'], source['original_size'],
+                sent.chat_id, sent.message_id, shown=source['preview_key'], source_id=source['source_id']
+            )
+    except ImageRejected as e:
+        logger.info(f"Rejected upload after reading its header: {str(e)}")
+        update.message.reply_text(str(e))
+    except ConversionPoolBusy:
+        logger.warning("Conversion pool is full, rejecting photo")
+        update.message.reply_text(
+            "I'm busy converting other images right now. Please send your photo again in a minute! ⏳"
         )
-        
+    except TimeoutError:
+        logger.warning("ASCII conversion timed out")
+        update.message.reply_text("Sorry, your image took too long to convert. Try a smaller width! ⏳")
     except Exception as e:
         error_message = f"Sorry, there was an error processing your image: {str(e)}"
         logger.error(f"Error in handle_photo: {str(e)}")
         update.message.reply_text(error_message)
     finally:
         # Delete processing message
-        try:
-            processing_message.delete()
-        except Exception:
-            pass  # Ignore errors when deleting processing message
+        _delete_quietly(processing_message)
+
+def _delete_quietly(message):
+    """Delete a message, ignoring errors (e.g. it was already deleted)."""
+    try:
+        message.delete()
+    except Exception:
+        pass
 
 def start(update: Update, context: CallbackContext):
     """Send a welcome message when the command /start is issued."""
@@ -756,7 +1259,7 @@ def settings(update: Update, context: CallbackContext):
     settings = context.user_data['ascii_settings']
     settings_text = (
         "Current Settings:\n\n"
-        f"Font Size: {settings['font_size']}\n"
+        f"Image Size: up to {ASCII_OUTPUT_PIXELS / 1e6:.1f} MP (font size follows width)\n"
         f"Width: {settings['width']}\n"
         f"Color Mode: {settings['color_mode']}\n\n"
         "Use /ascii to modify these settings."
@@ -778,7 +1281,7 @@ def menu_handler(update: Update, context: CallbackContext):
     query.answer()
     
     # Check if user is authorized to use this menu
-    if 'menu_state' not in context.user_data or \
+    if not sessions.active(context.user_data, update.effective_user.id, 'menu_state') or \
        context.user_data['menu_state']['user_id'] != update.effective_user.id:
         query.answer("This menu can only be used by the person who initiated it.", show_alert=True)
         return
@@ -789,39 +1292,48 @@ def menu_handler(update: Update, context: CallbackContext):
     
     settings = context.user_data['ascii_settings']
     
-    # Handle ASCII settings adjustments
+    # A pending settings edit must not overwrite what these buttons show instead
+    if query.data in ('menu_ascii', 'menu_about', 'menu_help', 'return_main'):
+        menu_edits.cancel((query.message.chat_id, query.message.message_id))
+    
+    # Handle ASCII settings adjustments: state changes now, the menu and preview follow shortly
     if query.data == 'ascii_width_up':
         settings['width'] = min(400, settings['width'] + 20)
-        handle_ascii_menu(update, context)
+        _schedule_menu_edit(update, context)
     elif query.data == 'ascii_width_down':
         settings['width'] = max(60, settings['width'] - 20)
-        handle_ascii_menu(update, context)
+        _schedule_menu_edit(update, context)
     elif query.data == 'ascii_contrast_up':
         settings['contrast'] = min(2.0, settings['contrast'] + 0.1)
-        handle_ascii_menu(update, context)
+        _schedule_menu_edit(update, context)
     elif query.data == 'ascii_contrast_down':
         settings['contrast'] = max(0.5, settings['contrast'] - 0.1)
-        handle_ascii_menu(update, context)
+        _schedule_menu_edit(update, context)
     elif query.data == 'ascii_brightness_up':
         settings['brightness'] = min(2.0, settings['brightness'] + 0.1)
-        handle_ascii_menu(update, context)
+        _schedule_menu_edit(update, context)
     elif query.data == 'ascii_brightness_down':
         settings['brightness'] = max(0.5, settings['brightness'] - 0.1)
-        handle_ascii_menu(update, context)
+        _schedule_menu_edit(update, context)
     elif query.data == 'ascii_color_mode':
         # Cycle through color modes
         color_modes = ['true_color', 'mono', 'green', 'blue', 'red', 'cyan', 'magenta', 'yellow', 'grayscale']
         current_index = color_modes.index(settings['color_mode'])
         settings['color_mode'] = color_modes[(current_index + 1) % len(color_modes)]
-        handle_ascii_menu(update, context)
+        _schedule_menu_edit(update, context)
+    elif query.data == 'ascii_output_mode':
+        # Toggle between image replies and monospace text replies
+        settings['output'] = 'text' if settings.get('output', 'image') == 'image' else 'image'
+        _schedule_menu_edit(update, context)
     elif query.data == 'ascii_reset':
         context.user_data['ascii_settings'] = default_ascii_settings.copy()
-        handle_ascii_menu(update, context)
+        _schedule_menu_edit(update, context)
     elif query.data == 'menu_tree':
-        query.message.reply_text(
+        sent_message = query.message.reply_text(
             "🌳 Welcome to the Sacred Tree of Life Personality Bot! 🌳\n"
             "Please reply to this message with your birthday in DD/MM format (e.g., 25/12 for December 25th)"
         )
+        reply_router.expect(sent_message, 'birthday', update.effective_user.id)
     elif query.data == 'menu_num':
         sent_message = query.message.reply_text(
             "🔮 Welcome to the Numerology Calculator! 🔮\n\n"
@@ -835,17 +1347,18 @@ def menu_handler(update: Update, context: CallbackContext):
             "Andy Chad Ayrey\n\n"
             "🔒 For privacy, your response will be deleted immediately after processing."
         )
-        context.user_data['numerology_request'] = {
+        sessions.start(context.user_data, update.effective_user.id, 'numerology_request', {
             'user_id': update.effective_user.id,
             'question_message_id': sent_message.message_id
-        }
+        })
+        reply_router.expect(sent_message, 'numerology', update.effective_user.id)
     elif query.data == 'menu_vibe':
-        context.user_data['frequency_test'] = {
+        sessions.start(context.user_data, update.effective_user.id, 'frequency_test', {
             'current_question': 1,
             'answers': {},
             'user_id': update.effective_user.id,
             'last_question_message_id': None
-        }
+        })
         
         question_data = FREQUENCY_QUESTIONS[1]
         message = f"{question_data['question']}\n\n"
@@ -857,6 +1370,7 @@ def menu_handler(update: Update, context: CallbackContext):
             "Answer each question by replying with a single letter (a, b, c, or d).\n\n" + message
         )
         context.user_data['frequency_test']['last_question_message_id'] = sent_message.message_id
+        reply_router.expect(sent_message, 'frequency_test', update.effective_user.id, step=1)
     elif query.data == 'menu_ascii':
         handle_ascii_menu(update, context)
     elif query.data == 'menu_about':
@@ -876,7 +1390,7 @@ def menu_handler(update: Update, context: CallbackContext):
             "🌟 How to Use Sacred Tree of Life Bot 🌟\n\n"
             "🌳 Tree Reading: Use /bday or send your birthdate (DD/MM)\n"
             "🔮 Numerology: Use /num and follow the prompts\n"
-            "🎨 ASCII Art: Send any image to convert\n"
+            "🎨 ASCII Art: Send any image, GIF or video to convert\n"
             "🎵 Frequency Test: Use /vibe and answer the questions\n\n"
             "Need more help? Feel free to ask! ��"
         )
@@ -906,14 +1420,78 @@ def menu_handler(update: Update, context: CallbackContext):
         )
         query.edit_message_text(welcome_message, reply_markup=InlineKeyboardMarkup(main_menu_keyboard))
 
+def _preview_key(settings: dict):
+    """Return the settings that determine how an ASCII image looks."""
+    return (settings['width'], round(settings['contrast'], 2), round(settings['brightness'], 2), settings['color_mode'])
+
+def _render_preview(bot, user_id: int, user_data: dict, settings: dict):
+    """Re-render the user's last ASCII image from the preview cache with settings and edit the reply in place."""
+    entry = previews.get(user_id)
+    if entry is None or settings.get('output', 'image') == 'text':
+        return
+    preview_key = _preview_key(settings)
+    # The reply already shows these settings
+    if entry['shown'] == preview_key:
+        return
+    
+    converter = ASCIIArtConverter(
+        width=settings['width'],
+        contrast=settings['contrast'],
+        brightness=settings['brightness'],
+        color_mode=settings['color_mode'],
+        renderer=ASCII_RENDERER,
+        output_pixels=ASCII_PREVIEW_PIXELS
+    )
+    grid_key = preview_key[:3]
+    grid = previews.glyph_grid(user_id, grid_key)
+    if grid is None:
+        grid = converter.map_grid(Image.fromarray(entry['source']))
+        previews.set_glyph_grid(user_id, grid_key, *grid)
+    # Telegram stores photos as JPEG anyway, and JPEG encodes about ten times faster than PNG
+    preview = BytesIO()
+    converter.render(*grid).save(preview, format='JPEG', quality=90)
+    
+    # Drop renders overtaken by another settings change
+    if user_data.get('ascii_settings') != settings:
+        return
+    orig_width, orig_height = entry['original_size']
+    caption = (
+        _ascii_caption(settings, orig_width, orig_height)
+        + "\n(Preview, send the image again for a full-quality render)"
+    )
+    try:
+        bot.edit_message_media(
+            chat_id=entry['chat_id'],
+            message_id=entry['message_id'],
+            media=InputMediaPhoto(BytesIO(preview.getvalue()), caption=caption)
+        )
+        previews.mark_shown(user_id, preview_key)
+        logger.info(f"Preview re-rendered: {previews.stats()}")
+    except BadRequest as e:
+        # The reply was deleted or is unchanged; stop previewing on a deleted reply
+        if 'not modified' not in str(e):
+            logger.info(f"Preview no longer editable: {str(e)}")
+            previews.discard(user_id)
+
 def handle_ascii_menu(update: Update, context: CallbackContext):
     """Handle ASCII art converter menu."""
     # Get current settings from context or use defaults
     if 'ascii_settings' not in context.user_data:
         context.user_data['ascii_settings'] = default_ascii_settings.copy()
     
-    settings = context.user_data['ascii_settings']
+    ascii_message, reply_markup = _ascii_menu(context.user_data['ascii_settings'])
     
+    # Photos sent as replies to the settings message are converted, also in groups
+    if update.callback_query:
+        update.callback_query.edit_message_text(ascii_message, reply_markup=reply_markup)
+        sent_message = update.callback_query.message
+    else:
+        sent_message = update.message.reply_text(ascii_message, reply_markup=reply_markup)
+    reply_router.expect(sent_message, 'ascii_settings')
+    menu_edits.shown((sent_message.chat_id, sent_message.message_id), (ascii_message, reply_markup.to_json()))
+
+def _ascii_menu(settings: dict):
+    """Build the ASCII settings menu text and keyboard for settings."""
     ascii_menu_keyboard = [
         [
             InlineKeyboardButton("Width +", callback_data='ascii_width_up'),
@@ -933,6 +1511,9 @@ def handle_ascii_menu(update: Update, context: CallbackContext):
         [
             InlineKeyboardButton(f"Color Mode: {settings['color_mode']}", callback_data='ascii_color_mode')
         ],
+        [
+            InlineKeyboardButton(f"Output: {settings.get('output', 'image')}", callback_data='ascii_output_mode')
+        ],
         [
             InlineKeyboardButton("Reset Settings", callback_data='ascii_reset')
         ],
@@ -947,34 +1528,68 @@ def handle_ascii_menu(update: Update, context: CallbackContext):
         f"• Width: {settings['width']} pixels (Affects detail level)\n"
         f"• Contrast: {settings['contrast']:.1f}\n"
         f"• Brightness: {settings['brightness']:.1f}\n"
-        f"• Color Mode: {settings['color_mode']}\n\n"
-        "Send me any image to convert it with these settings! 📸"
+        f"• Color Mode: {settings['color_mode']}\n"
+        f"• Output: {settings.get('output', 'image')} (text replies need a small width)\n\n"
+        "Send me any image, GIF or video to convert it with these settings! 📸"
     )
+    return ascii_message, InlineKeyboardMarkup(ascii_menu_keyboard)
+
+def _schedule_menu_edit(update: Update, context: CallbackContext):
+    """Update the tapped settings menu (and the preview) once the burst of taps is over."""
+    message = update.callback_query.message
+    reply_router.expect(message, 'ascii_settings')
+    key = (message.chat_id, message.message_id)
+    if menu_edits.request(key):
+        context.job_queue.run_once(_flush_menu_edit, menu_edits.delay, context=(key, update.effective_user.id))
+
+def _flush_menu_edit(context: CallbackContext):
+    """Show the current settings in a menu message and on the user's last ASCII image, once per burst of taps."""
+    key, user_id = context.job.context
+    if not menu_edits.take(key):
+        return
+    user_data = context.dispatcher.user_data[user_id]
+    settings = user_data.get('ascii_settings') or default_ascii_settings.copy()
     
-    if update.callback_query:
-        update.callback_query.edit_message_text(
-            ascii_message,
-            reply_markup=InlineKeyboardMarkup(ascii_menu_keyboard)
-        )
-    else:
-        update.message.reply_text(
-            ascii_message,
-            reply_markup=InlineKeyboardMarkup(ascii_menu_keyboard)
-        )
+    ascii_message, reply_markup = _ascii_menu(settings)
+    if menu_edits.changed(key, (ascii_message, reply_markup.to_json())):
+        try:
+            context.bot.edit_message_text(ascii_message, chat_id=key[0], message_id=key[1], reply_markup=reply_markup)
+        except BadRequest as e:
+            logger.info(f"Settings menu no longer editable: {str(e)}")
+    logger.info(f"Settings menu edits: {menu_edits.stats()}")
+    
+    context.dispatcher.run_async(_render_preview, context.bot, user_id, user_data, dict(settings))
 
-def main():
-    """Start the bot."""
-    # Create the Updater and pass it your bot's token
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    if not token:
-        raise ValueError("No token found in environment variables. Please set TELEGRAM_BOT_TOKEN in .env file")
+def sweep_sessions(context: CallbackContext):
+    """Expire abandoned conversations and persist the users whose state changed."""
+    changed = sessions.sweep()
+    persistence = context.dispatcher.persistence
+    if persistence:
+        for user_id in changed:
+            persistence.update_user_data(user_id, context.dispatcher.user_data[user_id])
+    if changed:
+        logger.info("Session sweep: %s", sessions.stats())
+
+class LocalWebhookBot(Bot):
+    """Bot that never registers its webhook with Telegram (webhook mode without WEBHOOK_URL)."""
     
-    # Initialize bot and updater
-    updater = Updater(token)
+    def set_webhook(self, *args, **kwargs) -> bool:
+        logger.info("WEBHOOK_URL is not set, so the webhook is not registered with Telegram")
+        return True
 
-    # Get the dispatcher to register handlers
-    dispatcher = updater.dispatcher
+def start_webhook(updater: Updater, url_path: str):
+    """Serve updates posted to WEBHOOK_LISTEN:WEBHOOK_PORT/<url_path>, registering WEBHOOK_URL with Telegram when it is set."""
+    updater.start_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=url_path,
+        webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{url_path}" if WEBHOOK_URL else None,
+        max_connections=WEBHOOK_MAX_CONNECTIONS
+    )
+    logger.info("Webhook listening on %s:%s", WEBHOOK_LISTEN, WEBHOOK_PORT)
 
+def register_handlers(dispatcher):
+    """Register the bot's command, message and callback handlers."""
     # Register command handlers
     dispatcher.add_handler(CommandHandler("start", start))
     dispatcher.add_handler(CommandHandler("help", help_command))
@@ -985,13 +1600,62 @@ def main():
 
     # Register message handlers
     dispatcher.add_handler(MessageHandler(Filters.photo & ~Filters.command, handle_photo))
+    # GIFs also arrive with a document attached, so animations are matched first
+    dispatcher.add_handler(MessageHandler((Filters.animation | Filters.video) & ~Filters.command, handle_animation))
+    dispatcher.add_handler(MessageHandler(Filters.document.image & ~Filters.command, handle_image_document))
+    dispatcher.add_handler(MessageHandler(Filters.text & Filters.reply & ~Filters.command, handle_messages))
     dispatcher.add_handler(CallbackQueryHandler(menu_handler))
 
+def main():
+    """Start the bot."""
+    global conversion_pool, file_id_store
+    # Create the Updater and pass it your bot's token
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        raise ValueError("No token found in environment variables. Please set TELEGRAM_BOT_TOKEN in .env file")
+    
+    # Start the conversion workers before the updater spawns its threads
+    conversion_pool = ConversionPool(
+        workers=ASCII_WORKERS,
+        max_pending=ASCII_MAX_PENDING,
+        timeout=ASCII_JOB_TIMEOUT
+    )
+    
+    file_id_store = FileIdStore(ASCII_FILE_ID_DB, max_entries=ASCII_FILE_ID_MAX)
+    reply_router.open(REPLY_ROUTER_DB)
+    
+    persistence = SQLitePersistence(BOT_PERSISTENCE_DB, flush_interval=BOT_PERSISTENCE_FLUSH)
+
+    # Initialize bot and updater
+    bot_class = LocalWebhookBot if BOT_MODE == 'webhook' and not WEBHOOK_URL else Bot
+    updater = Updater(
+        bot=bot_class(token, request=Request(con_pool_size=BOT_CON_POOL_SIZE)),
+        workers=BOT_WORKERS,
+        persistence=persistence
+    )
+
+    # The job queue would save every user ever loaded after each job; jobs that change
+    # user_data (sweep_sessions) persist those users themselves
+    updater.job_queue.scheduler.remove_listener(updater.job_queue._update_persistence)
+
+    # Get the dispatcher to register handlers
+    register_handlers(updater.dispatcher)
+
+    # Periodically drop conversations users walked away from
+    updater.job_queue.run_repeating(sweep_sessions, interval=SESSION_SWEEP_INTERVAL)
+
     # Start the Bot
-    updater.start_polling()
+    if BOT_MODE == 'webhook':
+        start_webhook(updater, WEBHOOK_PATH or token)
+    else:
+        updater.start_polling()
 
     # Run the bot until you press Ctrl-C
     updater.idle()
+    conversion_pool.shutdown()
+    file_id_store.close()
+    reply_router.close()
+    persistence.close()
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file